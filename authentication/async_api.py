@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.http import JsonResponse, QueryDict
+from django.utils.datastructures import MultiValueDict
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+
+from .backends import CachedJWTAuthentication
+
+_hashing_executor = None
+_lock = threading.Lock()
+
+
+def get_hashing_executor():
+    """
+    Return the thread pool reserved for password hashing.
+
+    PBKDF2 releases the GIL, so hashes run in parallel up to the pool size
+    while the event loop keeps serving other requests. The bound keeps a
+    burst of logins from starving the rest of the process of CPU.
+    """
+    global _hashing_executor
+    if _hashing_executor is None:
+        with _lock:
+            if _hashing_executor is None:
+                _hashing_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1,
+                    thread_name_prefix='password-hashing',
+                )
+    return _hashing_executor
+
+
+async def run_in_executor(executor, func, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+async def amake_password(raw_password):
+    return await run_in_executor(get_hashing_executor(), make_password, raw_password)
+
+
+async def acheck_password(user, raw_password):
+    """
+    Async counterpart of AbstractBaseUser.check_password, including the
+    rehash on a hasher upgrade.
+    """
+    upgraded = []
+
+    def setter(raw_password):
+        user.set_password(raw_password)
+        upgraded.append(True)
+
+    is_correct = await run_in_executor(get_hashing_executor(), check_password, raw_password, user.password, setter)
+    if upgraded:
+        await user.asave(update_fields=['password'])
+    return is_correct
+
+
+def get_list(data, key):
+    if hasattr(data, 'getlist'):
+        return data.getlist(key, [])
+    value = data.get(key, [])
+    return value if isinstance(value, list) else [value]
+
+
+class AsyncAPIView(View):
+    """
+    Base class for async views served under ASGI.
+
+    DRF's APIView only runs sync handlers, so this covers the parts of it
+    the async views need: CSRF exemption, JSON/form/multipart parsing for
+    any method, JWT authentication, an account type check, throttling and
+    JSON error responses in DRF's format.
+    """
+    authentication_required = False
+    account_types = None
+    throttle_classes = []
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if self.authentication_required:
+                await self.authenticate(request)
+            self.data, self.files = self.parse(request)
+            if self.throttle_classes:
+                await sync_to_async(self.check_throttles)(request)
+        except exceptions.APIException as error:
+            return self.handle_exception(error)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def authenticate(self, request):
+        authenticator = CachedJWTAuthentication()
+        result = await sync_to_async(authenticator.authenticate)(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        request.user, request.auth = result
+        if self.account_types is not None and request.user.account_type not in self.account_types:
+            raise exceptions.PermissionDenied()
+
+    def parse(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError as error:
+                raise exceptions.ParseError(f'JSON parse error - {error}')
+            if not isinstance(data, dict):
+                raise exceptions.ParseError('JSON body must be an object.')
+            return data, MultiValueDict()
+        if request.method == 'POST':
+            return request.POST, request.FILES
+        if request.content_type == 'multipart/form-data':
+            return request.parse_file_upload(request.META, request)
+        return QueryDict(request.body), MultiValueDict()
+
+    def check_throttles(self, request):
+        throttles = [throttle_class() for throttle_class in self.throttle_classes]
+        durations = [throttle.wait() for throttle in throttles if not throttle.allow_request(request, self)]
+        if durations:
+            raise exceptions.Throttled(max((duration for duration in durations if duration is not None), default=None))
+
+    def handle_exception(self, error):
+        data = error.detail if isinstance(error.detail, (list, dict)) else {'detail': error.detail}
+        response = JsonResponse(data, status=error.status_code, safe=False)
+        if error.status_code == status.HTTP_401_UNAUTHORIZED:
+            response['WWW-Authenticate'] = CachedJWTAuthentication().authenticate_header(self.request)
+        if getattr(error, 'wait', None):
+            response['Retry-After'] = '%d' % error.wait
+        return response
@@ -0,0 +1,153 @@
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework import status
+
+from .async_api import AsyncAPIView, acheck_password, amake_password
+from .helpers import generate_unique_phone, send_email
+from .models import User
+from .serializers import RegisterSerializer
+from .throttling import TokenBucketThrottle
+from .views import get_tokens_for_user
+
+# Async counterparts of the views in views.py, with the same request and
+# response formats. They are mounted under async/ and only pay off when the
+# project is served by an ASGI server (backend.asgi).
+
+
+class AsyncRegisterView(AsyncAPIView):
+    http_method_names = ['post']
+
+    async def post(self, request):
+        serializer = await sync_to_async(validate_registration)(self.data)
+        if serializer.errors:
+            return JsonResponse({
+                'status_code': 400,
+                'message': 'Invalid input. Please correct the highlighted errors and try again.',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            password = await amake_password(serializer.validated_data['password'])
+            user = await sync_to_async(create_registered_user)(serializer, password)
+        except Exception as error:
+            return JsonResponse({
+                'status_code': 500,
+                'message': f'An unexpected error occurred: {str(error)}. Please try again later.',
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return JsonResponse({
+            'status_code': 200,
+            'message': 'Registration successful. Please check your email to verify your account.',
+            'user': {
+                'email': user.email,
+                'username': user.username,
+                'phone_number': user.phone_number,
+                'is_verified': user.is_verified,
+            }
+        }, status=status.HTTP_200_OK)
+
+
+def validate_registration(data):
+    serializer = RegisterSerializer(data=data, context={
+        'phone_number': generate_unique_phone()
+    })
+    serializer.is_valid()
+    return serializer
+
+
+def create_registered_user(serializer, password):
+    """
+    Same as RegisterSerializer.create, with the password already hashed.
+    """
+    with transaction.atomic():
+        user = User(
+            username=serializer.validated_data['username'],
+            email=serializer.validated_data['email'],
+            phone_number=serializer.context.get('phone_number'),
+            password=password,
+        )
+        user.save()
+        send_email(user, email_type='registration')
+    return user
+
+
+class AsyncLoginView(AsyncAPIView):
+    http_method_names = ['post']
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login'
+
+    async def post(self, request):
+        email = self.data.get('email')
+        password = self.data.get('password')
+
+        if not email or not password:
+            return JsonResponse({
+                'status_code': 400,
+                'message': 'Both email and password are required to proceed.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            validate_email(email)
+        except ValidationError:
+            return JsonResponse({
+                'status_code': 400,
+                'message': 'The email address provided is not valid. Please enter a valid email address.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        user = await User.objects.filter(email=email).afirst()
+        if not user:
+            return JsonResponse({
+                'status_code': 404,
+                'message': 'No account associated with the provided email address was found.'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        if not await acheck_password(user, password):
+            return JsonResponse({
+                'status_code': 401,
+                'message': 'The password entered is incorrect. Please try again.'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        if not user.is_verified:
+            return JsonResponse({
+                'status_code': 401,
+                'message': 'Your email address has not been verified. Please verify your email before attempting to log in.'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            tokens = get_tokens_for_user(user)
+
+            user.last_login = timezone.now()
+            await user.asave(update_fields=['last_login'])
+        except Exception as e:
+            return JsonResponse({
+                'status_code': 500,
+                'message': f'An unexpected error occurred while generating tokens: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return JsonResponse({
+            'status_code': 200,
+            'message': 'Login successful. Welcome back!',
+            'refresh': tokens['refresh'],
+            'access': tokens['access'],
+            'data': {
+                'user': {
+                    'id': user.id,
+                    'username': user.username,
+                    'is_paid': user.is_paid,
+                    'full_name': user.full_name,
+                    'email': user.email,
+                    'image': user.image,
+                    'status': user.is_active,
+                    'country': user.country,
+                    'state': user.state,
+                    'postal_code': user.postal_code,
+                    'full_address': user.location,
+                    'phone_number': user.phone_number,
+                    'is_verified': user.is_verified
+                }
+            }
+        }, status=status.HTTP_200_OK)
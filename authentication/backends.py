@@ -0,0 +1,44 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .user_cache import auth_user_cache, get_user_version
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves the token's user from a per-process cache
+    instead of querying the users table on every request.
+
+    Entries are dropped when the user is saved, soft-deleted or changes
+    password (see User.save), and expire after AUTH_USER_CACHE_TTL seconds.
+    Without a shared default cache, every request reads the users table.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not auth_user_cache.enabled():
+            return super().get_user(validated_token)
+
+        user = auth_user_cache.get(user_id)
+        if user is None:
+            version = get_user_version(user_id)
+            user = super().get_user(validated_token)
+            auth_user_cache.set(user_id, user, version)
+            return user
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        return user
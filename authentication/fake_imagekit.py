@@ -0,0 +1,85 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPLOAD_PATH = '/api/v1/files/upload'
+
+
+class FakeImageKitHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        if self.path != UPLOAD_PATH:
+            return self.reply(404, {'message': 'Not found'})
+        if 'Authorization' not in self.headers:
+            return self.reply(401, {'message': 'Your request does not contain private API key.'})
+
+        # Drain the body in chunks, as the real service would.
+        remaining = int(self.headers.get('Content-Length', 0))
+        received = 0
+        while remaining:
+            chunk = self.rfile.read(min(remaining, 64 * 1024))
+            if not chunk:
+                break
+            received += len(chunk)
+            remaining -= len(chunk)
+
+        if server.latency:
+            time.sleep(server.latency)
+        with server.stats_lock:
+            server.uploads += 1
+            server.bytes_received += received
+        if server.failure_rate and random.random() < server.failure_rate:
+            return self.reply(503, {'message': 'Service temporarily unavailable'})
+
+        file_id = uuid.uuid4().hex
+        self.reply(200, {
+            'fileId': file_id,
+            'name': f'{file_id}.jpg',
+            'size': received,
+            'url': f'http://{self.headers.get("Host", "localhost")}/Quest-Board/{file_id}.jpg',
+        })
+
+    def reply(self, status_code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeImageKitServer(ThreadingHTTPServer):
+    """
+    Local stand-in for ImageKit's upload API, for offline tests and
+    benchmarks. `latency` adds a per-upload delay in seconds and
+    `failure_rate` makes that share of uploads answer 503.
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, failure_rate=0.0, verbose=False):
+        super().__init__((host, port), FakeImageKitHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.verbose = verbose
+        self.stats_lock = threading.Lock()
+        self.uploads = 0
+        self.bytes_received = 0
+
+    @property
+    def upload_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}{UPLOAD_PATH}'
+
+    def start_in_thread(self):
+        thread = threading.Thread(target=self.serve_forever, name='fake-imagekit', daemon=True)
+        thread.start()
+        return thread
@@ -1,13 +1,14 @@
 from datetime import timedelta
-from .models import EmailVerification, PasswordReset, User
+from .models import EmailVerification, PasswordReset, User, Specialty
+from .outbox import enqueue_email
 import secrets
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.core.mail import send_mail
 from django.utils.timezone import now
+from django.db import IntegrityError, transaction
 import random
-from requests.auth import HTTPBasicAuth
-import requests
+from .imagekit import upload_avatar
 
 def generate_unique_phone():
     while True:
@@ -21,6 +22,10 @@ def generate_otp():
 def send_email(user, email_type, otp=None):
     """
     Sends an email to the user for a specific purpose.
+
+    The email is written to the outbox and delivered by the deliver_emails
+    worker, so callers never wait on SMTP. Set EMAIL_OUTBOX_ENABLED = False
+    to send synchronously instead.
     
     Parameters:
     - user: The user object.
@@ -65,48 +70,57 @@ def send_email(user, email_type, otp=None):
     # Render email content
     email_body = render_to_string(template_name, {'otp': otp, 'user': user})
 
-    # Send the email
-    send_mail(
-        subject=subject,
-        message="",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=email_body,
-    )
+    if not getattr(settings, 'EMAIL_OUTBOX_ENABLED', True):
+        send_mail(
+            subject=subject,
+            message="",
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[user.email],
+            html_message=email_body,
+        )
+        return
 
-import os
-import mimetypes
-import requests
-from requests.auth import HTTPBasicAuth
+    # Queue the email in the caller's transaction; `manage.py deliver_emails` sends it.
+    enqueue_email(user.email, subject, email_body)
 
 def upload_to_imagekit(image_file):
-    imagekit_api_key = os.getenv("IMAGEKIT_PRIVATE_KEY")
-    print(imagekit_api_key)
-    if not imagekit_api_key:
-        raise RuntimeError("Missing ImageKit private key in env var")
-    upload_url = "https://upload.imagekit.io/api/v1/files/upload"
-    # upload_url = ""
-    filename = image_file.name
-    mime = mimetypes.guess_type(filename)[0] or "application/octet-stream"
-    files = {"file": (filename, image_file, mime)}
-    payload = {
-        "fileName": filename,
-        'folder': '/Quest-Board/'
-    }
-
-    resp = requests.post(
-        upload_url,
-        files=files,
-        data=payload,
-        auth=HTTPBasicAuth(imagekit_api_key, "")
-    )
-    try:
-        data = resp.json()
-    except ValueError:
-        raise Exception(f"Non-JSON response: {resp.status_code} {resp.text}")
-
-    if resp.ok and "url" in data:
-        return data["url"]
-    else:
-        err = data.get("error", {}).get("message", resp.text)
-        raise Exception(f"Upload failed ({resp.status_code}): {err}")
+    """
+    Upload a profile image to ImageKit and return its URL, through the shared
+    pooled client (see authentication.imagekit). The image is downscaled and
+    re-encoded first when Pillow is available.
+    """
+    return upload_avatar(image_file)
+
+
+def resolve_specialties(names):
+    """
+    Return Specialty ids for `names`, creating missing ones in bulk: one IN
+    lookup, plus an insert and re-read only for names not seen before.
+    """
+    names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+    if not names:
+        return []
+
+    ids = dict(Specialty.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        Specialty.objects.bulk_create([Specialty(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Specialty.objects.filter(name__in=missing).values_list('name', 'id'))
+    return [ids[name] for name in names]
+
+
+def set_user_specialties(user, names):
+    """
+    Replace the user's specialties with `names`.
+
+    A specialty resolved here can be swept as an orphan before it is linked,
+    so the link is retried once with freshly resolved ids.
+    """
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                user.specialties.set(resolve_specialties(names))
+            return
+        except IntegrityError:
+            if attempt:
+                raise
@@ -0,0 +1,254 @@
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.db import connection
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+from . import images
+from .models import User
+from .user_cache import invalidate_cached_user
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_URL = "https://upload.imagekit.io/api/v1/files/upload"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class ImageKitError(Exception):
+    pass
+
+
+class MultipartStream:
+    """
+    File-like multipart/form-data body that reads the file part lazily.
+
+    It reports its total length up front, so requests sends a Content-Length
+    header and streams the body in chunks instead of building it in memory.
+    """
+
+    def __init__(self, fields, file_field, filename, fileobj, content_type, file_size):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+
+        head = b''.join(
+            self._part_header(name) + value.encode() + b'\r\n'
+            for name, value in fields.items()
+        )
+        head += self._part_header(file_field, filename, content_type)
+        tail = f'\r\n--{self.boundary}--\r\n'.encode()
+
+        self._parts = [head, fileobj, tail]
+        self.len = len(head) + file_size + len(tail)
+        self._index = 0
+        self._buffer = b''
+
+    def _part_header(self, name, filename=None, content_type=None):
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += '; filename="{}"'.format(filename.replace('"', '%22'))
+        header = f'--{self.boundary}\r\nContent-Disposition: {disposition}\r\n'
+        if content_type:
+            header += f'Content-Type: {content_type}\r\n'
+        return (header + '\r\n').encode()
+
+    def __len__(self):
+        return self.len
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len
+        chunks = [self._buffer]
+        available = len(self._buffer)
+        while available < size and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                data = part
+                self._index += 1
+            else:
+                data = part.read(size - available)
+                if not data:
+                    self._index += 1
+                    continue
+            chunks.append(data)
+            available += len(data)
+        data = b''.join(chunks)
+        self._buffer = data[size:]
+        return data[:size]
+
+
+class ImageKitClient:
+    """
+    ImageKit upload client sharing one pooled HTTP session per process.
+
+    Uploads are streamed from the file object, bounded by connect/read
+    timeouts, and retried with exponential backoff on connection errors and
+    429/5xx responses.
+    """
+
+    def __init__(self, private_key, upload_url=DEFAULT_UPLOAD_URL, folder='/Quest-Board/',
+                 connect_timeout=3.05, read_timeout=30, max_retries=3, backoff_seconds=0.5,
+                 pool_size=10):
+        self.private_key = private_key
+        self.upload_url = upload_url
+        self.folder = folder
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.auth = HTTPBasicAuth(private_key, '')
+
+    def upload(self, fileobj, filename, file_size=None):
+        """
+        Upload `fileobj` and return the hosted file URL.
+        """
+        mime = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if file_size is None:
+            file_size = os.fstat(fileobj.fileno()).st_size
+        start = fileobj.tell()
+
+        for attempt in range(self.max_retries + 1):
+            fileobj.seek(start)
+            body = MultipartStream(
+                {'fileName': filename, 'folder': self.folder},
+                'file', filename, fileobj, mime, file_size,
+            )
+            try:
+                resp = self.session.post(
+                    self.upload_url,
+                    data=body,
+                    headers={'Content-Type': body.content_type},
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt == self.max_retries:
+                    raise ImageKitError(f"Upload failed after {attempt + 1} attempts: {error}")
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    return self._parse_response(resp)
+            time.sleep(self.backoff_seconds * 2 ** attempt)
+
+    def _parse_response(self, resp):
+        try:
+            data = resp.json()
+        except ValueError:
+            raise ImageKitError(f"Non-JSON response: {resp.status_code} {resp.text}")
+
+        if resp.ok and "url" in data:
+            return data["url"]
+        err = data.get("error", {}).get("message", resp.text) if isinstance(data, dict) else resp.text
+        raise ImageKitError(f"Upload failed ({resp.status_code}): {err}")
+
+
+_client = None
+_client_lock = threading.Lock()
+_executor = None
+
+
+def get_imagekit_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                private_key = os.getenv("IMAGEKIT_PRIVATE_KEY")
+                if not private_key:
+                    raise RuntimeError("Missing ImageKit private key in env var")
+                _client = ImageKitClient(
+                    private_key,
+                    upload_url=getattr(settings, 'IMAGEKIT_UPLOAD_URL', None) or DEFAULT_UPLOAD_URL,
+                    connect_timeout=getattr(settings, 'IMAGEKIT_CONNECT_TIMEOUT', 3.05),
+                    read_timeout=getattr(settings, 'IMAGEKIT_READ_TIMEOUT', 30),
+                )
+    return _client
+
+
+def get_upload_executor():
+    global _executor
+    if _executor is None:
+        with _client_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGEKIT_DEFERRED_WORKERS', 4),
+                    thread_name_prefix='imagekit-upload',
+                )
+    return _executor
+
+
+def upload_file(image_file):
+    """
+    Upload a Django UploadedFile and return its URL.
+    """
+    return get_imagekit_client().upload(image_file, image_file.name, image_file.size)
+
+
+def upload_processed(processed):
+    """
+    Upload an images.ProcessedImage, then delete its file.
+    """
+    try:
+        started = time.perf_counter()
+        with open(processed.path, 'rb') as fileobj:
+            url = get_imagekit_client().upload(fileobj, processed.name, processed.size)
+        processed.timings['upload_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        images.logger.info('Uploaded avatar %s: %s', processed.name, processed.timings)
+        return url
+    finally:
+        processed.cleanup()
+
+
+def upload_avatar(image_file):
+    """
+    Downscale and re-encode a profile image when processing is enabled, then
+    upload it and return its URL.
+    """
+    if images.is_enabled():
+        return upload_processed(images.process_avatar(image_file))
+    return upload_file(image_file)
+
+
+def upload_user_image_deferred(user_id, image_file):
+    """
+    Upload in the background and store the URL on User.image when done.
+
+    The upload is spooled to a private temporary file first, because Django
+    discards request uploads once the response is sent. Returns the Future;
+    failures are also logged, since request handlers never read it.
+    """
+    spooled = tempfile.NamedTemporaryFile(suffix=os.path.splitext(image_file.name)[1], delete=False)
+    with spooled:
+        image_file.seek(0)
+        shutil.copyfileobj(image_file, spooled)
+    filename = image_file.name
+
+    def run():
+        try:
+            if images.is_enabled():
+                url = upload_processed(images.process_avatar_path(spooled.name, filename))
+            else:
+                with open(spooled.name, 'rb') as fileobj:
+                    url = get_imagekit_client().upload(fileobj, filename)
+            User.objects.filter(pk=user_id).update(image=url)
+            invalidate_cached_user(user_id)
+            return url
+        except Exception:
+            logger.exception('Deferred image upload for user %s failed', user_id)
+            raise
+        finally:
+            os.unlink(spooled.name)
+            # This worker thread opened its own DB connection.
+            connection.close()
+
+    return get_upload_executor().submit(run)
@@ -0,0 +1,192 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it avatars upload unprocessed.
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'MPO'}
+EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg', 'PNG': '.png'}
+
+
+class ImageProcessingError(Exception):
+    pass
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def transcode_avatar(source_path, max_size, output_format, quality):
+    """
+    Validate, downscale and re-encode the image at `source_path`.
+
+    Runs in a worker process. Metadata (EXIF, ICC, XMP) is dropped by
+    re-encoding from pixels only, after applying the EXIF orientation.
+    Returns (output_path, timings) or raises ImageProcessingError.
+    """
+    timings = {}
+    started = time.perf_counter()
+    try:
+        with Image.open(source_path) as probe:
+            if probe.format not in ALLOWED_FORMATS:
+                raise ImageProcessingError(f'Unsupported image format: {probe.format}.')
+            probe.verify()
+    except ImageProcessingError:
+        raise
+    except Exception as error:
+        raise ImageProcessingError(f'Invalid image file: {error}')
+    timings['validate_ms'] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    try:
+        with Image.open(source_path) as image:
+            # Let the JPEG decoder scale by 1/2, 1/4 or 1/8 while decoding.
+            image.draft('RGB', max_size)
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except Exception as error:
+        raise ImageProcessingError(f'Could not decode image: {error}')
+    timings['decode_ms'] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    image.thumbnail(max_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if output_format == 'JPEG' or not has_alpha:
+        image = image.convert('RGB')
+    elif image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    timings['resize_ms'] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    fd, output_path = tempfile.mkstemp(suffix=EXTENSIONS.get(output_format, ''))
+    with os.fdopen(fd, 'wb') as output:
+        image.save(output, format=output_format, quality=quality, optimize=True)
+    timings['encode_ms'] = _elapsed_ms(started)
+    timings['output_bytes'] = os.path.getsize(output_path)
+    timings['output_width'], timings['output_height'] = image.size
+    return output_path, timings
+
+
+class ProcessedImage:
+    def __init__(self, path, name, timings):
+        self.path = path
+        self.name = name
+        self.timings = timings
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path)
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def is_enabled():
+    return Image is not None and getattr(settings, 'AVATAR_PROCESSING_ENABLED', True)
+
+
+def get_executor():
+    """
+    Return the shared process pool and the semaphore bounding in-flight jobs.
+    """
+    global _executor, _slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2)
+                _slots = threading.BoundedSemaphore(workers * 2)
+                _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _executor, _slots
+
+
+def _discard_output(future):
+    if not future.cancelled() and future.exception() is None:
+        output_path, _ = future.result()
+        try:
+            os.unlink(output_path)
+        except FileNotFoundError:
+            pass
+
+
+def process_avatar_path(source_path, original_name):
+    """
+    Downscale and re-encode the image file at `source_path` in the process
+    pool. The caller owns the returned ProcessedImage and must clean it up.
+    """
+    output_format = getattr(settings, 'AVATAR_FORMAT', 'WEBP')
+    executor, slots = get_executor()
+    timeout = getattr(settings, 'IMAGE_PROCESSING_TIMEOUT', 20)
+
+    started = time.perf_counter()
+    if not slots.acquire(timeout=timeout):
+        raise ImageProcessingError('Image processing is busy. Please try again.')
+    try:
+        queued_at = time.perf_counter()
+        future = executor.submit(
+            transcode_avatar,
+            source_path,
+            tuple(getattr(settings, 'AVATAR_MAX_SIZE', (512, 512))),
+            output_format,
+            getattr(settings, 'AVATAR_QUALITY', 82),
+        )
+    except BaseException:
+        slots.release()
+        raise
+    # Held until the worker is done, even if this caller stops waiting.
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        output_path, timings = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        # A running worker cannot be interrupted; drop its output when it ends.
+        if not future.cancel():
+            future.add_done_callback(_discard_output)
+        raise ImageProcessingError('Image processing timed out. Please try again.')
+    timings['wait_ms'] = round((queued_at - started) * 1000, 2)
+    timings['total_ms'] = _elapsed_ms(started)
+
+    stem = os.path.splitext(os.path.basename(original_name))[0] or 'avatar'
+    processed = ProcessedImage(output_path, stem + EXTENSIONS.get(output_format, ''), timings)
+    logger.info('Processed avatar %s: %s', original_name, timings)
+    return processed
+
+
+def process_avatar(image_file):
+    """
+    Process a Django UploadedFile. Large uploads are read straight from
+    Django's temporary file; small in-memory ones are spooled to disk for the
+    worker process.
+    """
+    if hasattr(image_file, 'temporary_file_path'):
+        return process_avatar_path(image_file.temporary_file_path(), image_file.name)
+
+    started = time.perf_counter()
+    with tempfile.NamedTemporaryFile(delete=False) as spooled:
+        image_file.seek(0)
+        shutil.copyfileobj(image_file, spooled)
+    spool_ms = _elapsed_ms(started)
+    try:
+        processed = process_avatar_path(spooled.name, image_file.name)
+    finally:
+        os.unlink(spooled.name)
+    processed.timings['spool_ms'] = spool_ms
+    return processed
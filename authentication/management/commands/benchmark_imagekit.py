@@ -0,0 +1,54 @@
+import io
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from authentication.fake_imagekit import FakeImageKitServer
+from authentication.imagekit import ImageKitClient
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ImageKit uploads against the local fake server (or --url).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Upload URL; defaults to an in-process fake server.')
+        parser.add_argument('--uploads', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--size-kb', type=int, default=2048)
+        parser.add_argument('--latency', type=float, default=0.02, help='Fake server delay per upload, in seconds.')
+
+    def handle(self, *args, **options):
+        server = None
+        url = options['url']
+        if not url:
+            server = FakeImageKitServer(latency=options['latency'])
+            server.start_in_thread()
+            url = server.upload_url
+
+        payload = os.urandom(options['size_kb'] * 1024)
+        client = ImageKitClient('benchmark-key', upload_url=url, pool_size=options['concurrency'])
+
+        def upload(n):
+            started = time.perf_counter()
+            client.upload(io.BytesIO(payload), f'avatar-{n}.jpg', len(payload))
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            latencies = sorted(pool.map(upload, range(options['uploads'])))
+        elapsed = time.perf_counter() - started
+
+        if server:
+            server.shutdown()
+            server.server_close()
+
+        megabytes = options['uploads'] * len(payload) / 2 ** 20
+        self.stdout.write(
+            f"{options['uploads']} uploads of {options['size_kb']} KiB in {elapsed:.2f}s "
+            f"({options['uploads'] / elapsed:.1f} uploads/s, {megabytes / elapsed:.1f} MiB/s)\n"
+            f"latency ms p50={statistics.median(latencies):.1f} "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1]:.1f} max={latencies[-1]:.1f}"
+        )
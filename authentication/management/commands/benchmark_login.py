@@ -0,0 +1,94 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import setup_test_environment
+
+from authentication.models import User
+
+BENCHMARK_EMAIL = 'benchmark-login@example.com'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare login throughput of the sync view through the WSGI handler '
+        'with the async view through the ASGI handler, under concurrency.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--mode', choices=['wsgi', 'asgi', 'both'], default='both')
+        parser.add_argument('--keep-rate-limits', action='store_true',
+                            help='Leave RATE_LIMITS on; by default they are lifted so every login is measured.')
+
+    def handle(self, *args, **options):
+        # Allows the test client's "testserver" host and keeps mail local.
+        try:
+            setup_test_environment()
+        except RuntimeError:
+            pass  # Already set up, e.g. when called from the test suite.
+
+        # Every request logs in the same email, which the login rate limit
+        # would throttle after a few requests.
+        stubs = {} if options['keep_rate_limits'] else {'RATE_LIMITS': {}}
+        with override_settings(**stubs):
+            self.benchmark(options)
+
+    def benchmark(self, options):
+
+        user = User.objects.filter(email=BENCHMARK_EMAIL).first()
+        if user is None:
+            user = User(email=BENCHMARK_EMAIL, username='benchmark-login', phone_number='00000000000', is_verified=True)
+            user.set_password(BENCHMARK_PASSWORD)
+            user.save()
+
+        payload = {'email': BENCHMARK_EMAIL, 'password': BENCHMARK_PASSWORD}
+        total, concurrency = options['requests'], options['concurrency']
+
+        if options['mode'] in ('wsgi', 'both'):
+            self.report('WSGI /authentication/api/login/', *self.run_wsgi(payload, total, concurrency))
+        if options['mode'] in ('asgi', 'both'):
+            self.report('ASGI /authentication/api/async/login/', *asyncio.run(self.run_asgi(payload, total, concurrency)))
+
+    def run_wsgi(self, payload, total, concurrency):
+        def login(n):
+            started = time.perf_counter()
+            response = Client().post('/authentication/api/login/', payload, content_type='application/json')
+            assert response.status_code == 200, response.content
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        if concurrency == 1:
+            latencies = [login(n) for n in range(total)]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = list(pool.map(login, range(total)))
+        return latencies, time.perf_counter() - started
+
+    async def run_asgi(self, payload, total, concurrency):
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with slots:
+                started = time.perf_counter()
+                response = await client.post('/authentication/api/async/login/', payload, content_type='application/json')
+                assert response.status_code == 200, response.content
+                return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(login() for _ in range(total)))
+        return latencies, time.perf_counter() - started
+
+    def report(self, label, latencies, elapsed):
+        latencies = sorted(latencies)
+        self.stdout.write(
+            f"{label}: {len(latencies)} logins in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} logins/s)\n"
+            f"  latency ms p50={statistics.median(latencies):.1f} "
+            f"p95={latencies[int(len(latencies) * 0.95) - 1]:.1f} max={latencies[-1]:.1f}"
+        )
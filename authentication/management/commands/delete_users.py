@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import UserDeletionJob
+from authentication.user_deletion import run_deletion_job
+
+
+class Command(BaseCommand):
+    help = 'Run or resume user deletion jobs, e.g. after the process running one was restarted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, help='Job id; defaults to every unfinished job.')
+
+    def handle(self, *args, **options):
+        jobs = UserDeletionJob.objects.exclude(status='completed').order_by('id')
+        if options['job']:
+            jobs = jobs.filter(pk=options['job'])
+            if not jobs.exists():
+                raise CommandError(f"No unfinished user deletion job {options['job']}.")
+
+        for job_id in list(jobs.values_list('pk', flat=True)):
+            job = run_deletion_job(job_id)
+            message = f'Job {job.pk} {job.status}: deleted {job.deleted_users} of {job.total_users} users.'
+            self.stdout.write(self.style.SUCCESS(message) if job.status == 'completed' else self.style.ERROR(message))
@@ -0,0 +1,71 @@
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from authentication.outbox import claim_batch, deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the email_outbox table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Delivery threads, each with its own DB and SMTP connection.')
+        parser.add_argument('--batch-size', type=int, default=50, help='Emails claimed and sent per SMTP connection.')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Attempts before an email is marked failed.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the outbox is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once no due emails remain.')
+
+    def handle(self, *args, **options):
+        self.totals = {'sent': 0, 'failed': 0}
+        self.totals_lock = threading.Lock()
+        self.stop = threading.Event()
+
+        try:
+            if options['workers'] <= 1:
+                self.run_worker(options)
+            else:
+                self.run_pool(options)
+        except KeyboardInterrupt:
+            self.stop.set()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Delivered {self.totals['sent']} emails; {self.totals['failed']} failed attempts."
+        ))
+
+    def run_pool(self, options):
+        def target():
+            try:
+                self.run_worker(options)
+            finally:
+                # Each thread opened its own DB connection.
+                connection.close()
+
+        workers = [
+            threading.Thread(target=target, name=f'deliver-emails-{n}')
+            for n in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=0.5)
+        finally:
+            self.stop.set()
+            for worker in workers:
+                worker.join()
+
+    def run_worker(self, options):
+        while not self.stop.is_set():
+            emails = claim_batch(options['batch_size'])
+            if not emails:
+                if options['once']:
+                    return
+                self.stop.wait(options['poll_interval'])
+                continue
+
+            sent, failed = deliver_batch(emails, max_attempts=options['max_attempts'])
+            with self.totals_lock:
+                self.totals['sent'] += sent
+                self.totals['failed'] += failed
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from authentication.fake_imagekit import FakeImageKitServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake ImageKit upload server (point IMAGEKIT_UPLOAD_URL at it).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering each upload.')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of uploads answered with 503.')
+
+    def handle(self, *args, **options):
+        server = FakeImageKitServer(
+            options['host'], options['port'],
+            latency=options['latency'], failure_rate=options['failure_rate'], verbose=True,
+        )
+        self.stdout.write(f'Fake ImageKit listening on {server.upload_url}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils.timezone import now
+
+from authentication.models import EmailVerification, PasswordReset
+
+
+def purgeable(model, cutoff):
+    return model.objects.filter(Q(expires_at__lt=cutoff) | Q(is_used=True, updated_at__lt=cutoff))
+
+
+class Command(BaseCommand):
+    help = 'Delete expired and used email verification and password reset OTPs, in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+        parser.add_argument('--retention-minutes', type=int, default=0,
+                            help='Keep rows that expired or were used less than this long ago.')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=300.0)
+
+    def handle(self, *args, **options):
+        while True:
+            cutoff = now() - timedelta(minutes=options['retention_minutes'])
+            for model in (EmailVerification, PasswordReset):
+                deleted = self.sweep(model, cutoff, options['batch_size'], options['pause'])
+                self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} {model._meta.db_table} rows.'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def sweep(self, model, cutoff, batch_size, pause):
+        deleted = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                purgeable(model, cutoff).filter(pk__gt=last_pk)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                return deleted
+            last_pk = batch[-1]
+            # Re-check the condition in the DELETE itself so an OTP re-issued
+            # since the scan (PasswordReset rows are updated in place) is kept.
+            count, _ = purgeable(model, cutoff).filter(pk__in=batch).delete()
+            deleted += count
+            if pause:
+                time.sleep(pause)
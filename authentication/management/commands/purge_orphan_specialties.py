@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from authentication.models import Specialty, User
+
+
+def orphaned_specialties():
+    links = User.specialties.through.objects.filter(specialty_id=OuterRef('pk'))
+    return Specialty.objects.filter(~Exists(links))
+
+
+def delete_if_orphaned(pks):
+    """
+    Delete the specialties in `pks` that are still unlinked, re-checking
+    NOT EXISTS in the DELETE itself so a specialty linked since the scan is
+    kept. QuerySet.delete() would instead clear the through table for the
+    scanned ids, dropping such a new link.
+    """
+    qn = connection.ops.quote_name
+    specialty = Specialty._meta
+    through = User.specialties.through._meta
+    specialty_column = through.get_field('specialty').column
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {qn(specialty.db_table)} '
+            f'WHERE {qn(specialty.pk.column)} IN ({", ".join(["%s"] * len(pks))}) '
+            f'AND NOT EXISTS (SELECT 1 FROM {qn(through.db_table)} '
+            f'WHERE {qn(through.db_table)}.{qn(specialty_column)} = {qn(specialty.db_table)}.{qn(specialty.pk.column)})',
+            pks,
+        )
+        return cursor.rowcount
+
+
+class Command(BaseCommand):
+    help = 'Delete specialties no longer linked to any user, in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches.')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=300.0)
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.sweep(options['batch_size'], options['pause'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} orphaned specialties.'))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size, pause):
+        deleted = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                orphaned_specialties().filter(pk__gt=last_pk)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                return deleted
+            last_pk = batch[-1]
+            deleted += delete_if_orphaned(batch)
+            if pause:
+                time.sleep(pause)
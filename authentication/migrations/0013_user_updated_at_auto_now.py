@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0012_specialty_user_specialties'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
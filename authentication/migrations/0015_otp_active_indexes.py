@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0014_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailverification',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['user', 'expires_at'], name='email_verif_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordreset',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['user', 'otp'], name='password_reset_active_idx'),
+        ),
+    ]
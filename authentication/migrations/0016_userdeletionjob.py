@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0015_otp_active_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requested_by', models.EmailField(max_length=254)),
+                ('keep_user_id', models.BigIntegerField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('batch_size', models.PositiveIntegerField(default=500)),
+                ('max_user_id', models.BigIntegerField(default=0)),
+                ('last_user_id', models.BigIntegerField(default=0)),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('deleted_users', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'user_deletion_job',
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.timezone import now
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from decimal import Decimal
+from .user_cache import invalidate_cached_user
 
 # Create your models here.
 
@@ -18,7 +19,29 @@ PAYMENT_STATUS_CHOICES = [
 ]
 
 
-class UserManager(BaseUserManager):
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    QuerySet for models soft-deleted by setting `deleted_at`.
+    """
+
+    def live(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        return self.filter(deleted_at__isnull=False)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager returning live rows only. Pair it with an unfiltered
+    `all_objects = SoftDeleteQuerySet.as_manager()` for the with-deleted view.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().live()
+
+
+class UserManager(BaseUserManager.from_queryset(SoftDeleteQuerySet)):
     def create_user(self, email, user_name, password=None, **extra_fields):
         '''Creates and saves a User with the given email and password.
 
@@ -49,7 +72,7 @@ class UserManager(BaseUserManager):
         return self.create_user(email, user_name, password, **extra_fields)
     
     def get_queryset(self):
-        return super().get_queryset().filter(deleted_at__isnull=True)
+        return super().get_queryset().live()
 
 
 class Specialty(models.Model):
@@ -94,11 +117,12 @@ class User(AbstractBaseUser):
     tasks_completed = models.IntegerField(default=0, null=False, blank=False)
 
     created_at = models.DateTimeField(auto_now_add=True, null=False, blank=False)
-    updated_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
     deleted_by = models.CharField(max_length=255, null=True, blank=True)
 
     objects = UserManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -108,6 +132,17 @@ class User(AbstractBaseUser):
 
     def __str__(self):
         return self.username
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Covers profile edits, password changes and soft deletes.
+        invalidate_cached_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        invalidate_cached_user(user_id)
+        return result
     
     def soft_delete(self, admin_email):
         """Soft delete the user."""
@@ -129,6 +164,15 @@ class EmailVerification(models.Model):
 
     class Meta:
         db_table = 'email_verification'
+        indexes = [
+            # Active OTPs only. RegenerateOtpView takes a user's latest by
+            # expires_at; VerifyEmailView checks the otp on those few rows.
+            models.Index(
+                fields=['user', 'expires_at'],
+                name='email_verif_active_idx',
+                condition=models.Q(is_used=False),
+            ),
+        ]
 
 
 class PasswordReset(models.Model):
@@ -143,3 +187,83 @@ class PasswordReset(models.Model):
 
     class Meta:
         db_table = 'password_reset'
+        indexes = [
+            models.Index(
+                fields=['user', 'otp'],
+                name='password_reset_active_idx',
+                condition=models.Q(is_used=False),
+            ),
+        ]
+
+
+OUTBOX_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('sending', 'Sending'),
+    ('sent', 'Sent'),
+    ('failed', 'Failed'),
+]
+
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing email queued in the caller's transaction and delivered later by
+    the deliver_emails worker.
+
+    `next_attempt_at` is the retry time for pending rows and the lease expiry
+    for rows a worker has claimed, so crashed deliveries are picked up again.
+    """
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html_body = models.TextField()
+    status = models.CharField(max_length=20, choices=OUTBOX_STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=now)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'email_outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'),
+        ]
+
+
+DELETION_JOB_STATUS_CHOICES = [
+    ('pending', 'Pending'),
+    ('running', 'Running'),
+    ('completed', 'Completed'),
+    ('failed', 'Failed'),
+]
+
+
+class UserDeletionJob(models.Model):
+    """
+    Progress of a bulk user deletion run by authentication.user_deletion.
+
+    Users are deleted in primary key order up to `max_user_id`, the highest
+    id when the job was created. `last_user_id` is committed together with
+    each chunk, so an interrupted job resumes where it stopped.
+    """
+    requested_by = models.EmailField()
+    keep_user_id = models.BigIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=DELETION_JOB_STATUS_CHOICES, default='pending')
+    batch_size = models.PositiveIntegerField(default=500)
+    max_user_id = models.BigIntegerField(default=0)
+    last_user_id = models.BigIntegerField(default=0)
+    total_users = models.PositiveIntegerField(default=0)
+    deleted_users = models.PositiveIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'user_deletion_job'
+
+    @property
+    def progress(self):
+        if not self.total_users:
+            return 100.0 if self.status == 'completed' else 0.0
+        return round(min(100.0, self.deleted_users * 100 / self.total_users), 1)
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from .models import EmailOutbox
+
+
+def enqueue_email(to_email, subject, html_body):
+    """
+    Queue an email for the delivery worker. Call inside the transaction that
+    creates the data the email refers to, so both commit or neither does.
+    """
+    return EmailOutbox.objects.create(to_email=to_email, subject=subject, html_body=html_body)
+
+
+def claim_batch(batch_size, lease_seconds=300):
+    """
+    Claim up to `batch_size` due emails for this worker.
+
+    Rows are locked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    workers never claim the same email, and leased until `lease_seconds`
+    from now in case this worker dies mid-delivery.
+    """
+    current_time = now()
+    with transaction.atomic():
+        emails = list(
+            EmailOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(Q(status='pending') | Q(status='sending'), next_attempt_at__lte=current_time)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if emails:
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+                status='sending',
+                next_attempt_at=current_time + timedelta(seconds=lease_seconds),
+            )
+    return emails
+
+
+def retry_delay(attempts, base_seconds=30, max_seconds=3600):
+    return timedelta(seconds=min(base_seconds * 2 ** (attempts - 1), max_seconds))
+
+
+def deliver_batch(emails, max_attempts=5):
+    """
+    Send claimed emails over one SMTP connection and record each outcome.
+
+    Failed sends are rescheduled with exponential backoff until
+    `max_attempts`, then marked failed. Returns (sent, failed) counts.
+    """
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            _record_failure(email, error, max_attempts)
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            message = EmailMultiAlternatives(
+                subject=email.subject,
+                body='',
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[email.to_email],
+                connection=connection,
+            )
+            message.attach_alternative(email.html_body, 'text/html')
+            try:
+                message.send()
+            except Exception as error:
+                failed += 1
+                _record_failure(email, error, max_attempts)
+            else:
+                sent += 1
+                EmailOutbox.objects.filter(pk=email.pk).update(
+                    status='sent',
+                    attempts=email.attempts + 1,
+                    sent_at=now(),
+                    last_error=None,
+                )
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(email, error, max_attempts):
+    attempts = email.attempts + 1
+    gave_up = attempts >= max_attempts
+    EmailOutbox.objects.filter(pk=email.pk).update(
+        status='failed' if gave_up else 'pending',
+        attempts=attempts,
+        next_attempt_at=now() if gave_up else now() + retry_delay(attempts),
+        last_error=str(error)[:2000],
+    )
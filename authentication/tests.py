@@ -0,0 +1,534 @@
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .fake_imagekit import FakeImageKitServer
+from .management.commands.purge_orphan_specialties import delete_if_orphaned
+from .images import ImageProcessingError, process_avatar
+from .imagekit import ImageKitClient, ImageKitError, upload_user_image_deferred
+from .helpers import set_user_specialties
+from .models import EmailOutbox, EmailVerification, PasswordReset, Specialty, User, UserDeletionJob
+from .throttling import CacheBucketStore, LocalBucketStore, get_bucket_store
+from .user_cache import auth_user_cache, user_version_key
+from .user_deletion import create_deletion_job, delete_next_chunk, run_deletion_job
+from tasksmith.helpers import get_marketplace_version
+from tasksmith.models import Tags, TasksDetail
+from tasksmith.search import get_search_backend
+
+# Create your tests here.
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def register(self, email='new@example.com'):
+        response = self.client.post(reverse('register'), {
+            'username': 'new', 'email': email, 'password': 'pass12345',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def deliver(self, *args):
+        call_command('deliver_emails', '--once', *args, stdout=StringIO())
+
+    def test_registration_queues_email_instead_of_sending(self):
+        self.register()
+
+        self.assertEqual(len(mail.outbox), 0)
+        queued = EmailOutbox.objects.get()
+        self.assertEqual((queued.to_email, queued.status), ('new@example.com', 'pending'))
+        self.assertIn(User.objects.get().emailverification_set.get().otp, queued.html_body)
+
+    def test_worker_delivers_batch_over_one_connection(self):
+        self.register('a@example.com')
+        self.register('b@example.com')
+
+        with mock.patch('authentication.outbox.get_connection', wraps=mail.get_connection) as get_connection:
+            self.deliver()
+
+        get_connection.assert_called_once()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['a@example.com', 'b@example.com'])
+        self.assertEqual(EmailOutbox.objects.filter(status='sent').count(), 2)
+
+    def test_failed_send_is_retried_with_backoff_then_given_up(self):
+        self.register()
+
+        with mock.patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('smtp down')):
+            self.deliver('--max-attempts', '2')
+            queued = EmailOutbox.objects.get()
+            self.assertEqual((queued.status, queued.attempts), ('pending', 1))
+            self.assertGreater(queued.next_attempt_at, now())
+
+            EmailOutbox.objects.update(next_attempt_at=now())
+            self.deliver('--max-attempts', '2')
+
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts, queued.last_error), ('failed', 2, 'smtp down'))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_expired_lease_is_reclaimed(self):
+        self.register()
+        EmailOutbox.objects.update(status='sending', next_attempt_at=now())
+
+        self.deliver()
+
+        self.assertEqual(EmailOutbox.objects.get().status, 'sent')
+
+
+def make_image_bytes(image_format, size=(1600, 1200), exif=None):
+    output = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(output, format=image_format, exif=exif or Image.Exif())
+    return output.getvalue()
+
+
+class AvatarProcessingTests(TestCase):
+    def test_large_photo_is_downscaled_reencoded_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'  # Make
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees
+        upload = SimpleUploadedFile('photo.jpg', make_image_bytes('JPEG', exif=exif))
+
+        processed = process_avatar(upload)
+        self.addCleanup(processed.cleanup)
+
+        with Image.open(processed.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (384, 512))
+            self.assertFalse(image.getexif())
+        self.assertEqual(processed.name, 'photo.webp')
+        self.assertTrue({'validate_ms', 'decode_ms', 'resize_ms', 'encode_ms', 'spool_ms'} <= processed.timings.keys())
+
+    def test_non_image_is_rejected(self):
+        with self.assertRaises(ImageProcessingError):
+            process_avatar(SimpleUploadedFile('photo.jpg', b'not an image'))
+
+    @override_settings(IMAGE_PROCESSING_TIMEOUT=0.05)
+    def test_timeout_is_a_processing_error_and_output_is_discarded(self):
+        outputs = []
+
+        def slow_transcode(*args):
+            time.sleep(0.3)
+            fd, path = tempfile.mkstemp()
+            os.close(fd)
+            outputs.append(path)
+            return path, {}
+
+        executor, slots = ThreadPoolExecutor(max_workers=1), threading.BoundedSemaphore(1)
+        self.addCleanup(executor.shutdown)
+        with mock.patch('authentication.images.get_executor', return_value=(executor, slots)), \
+                mock.patch('authentication.images.transcode_avatar', slow_transcode):
+            with self.assertRaisesMessage(ImageProcessingError, 'timed out'):
+                process_avatar(SimpleUploadedFile('photo.png', make_image_bytes('PNG')))
+            executor.shutdown(wait=True)
+
+        self.assertEqual(len(outputs), 1)
+        self.assertFalse(os.path.exists(outputs[0]))
+        # The slot was held until the worker finished, then released.
+        self.assertTrue(slots.acquire(blocking=False))
+
+
+class ImageKitClientTests(TestCase):
+    def setUp(self):
+        self.server = FakeImageKitServer()
+        self.server.start_in_thread()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = ImageKitClient('test-key', upload_url=self.server.upload_url, backoff_seconds=0)
+
+    def test_upload_streams_file_and_returns_url(self):
+        payload = b'x' * 100_000
+        url = self.client.upload(BytesIO(payload), 'avatar.jpg', len(payload))
+
+        self.assertTrue(url.endswith('.jpg'))
+        self.assertEqual(self.server.uploads, 1)
+        self.assertGreater(self.server.bytes_received, len(payload))
+
+    def test_server_errors_are_retried_then_raised(self):
+        self.server.failure_rate = 1.0
+        with self.assertRaises(ImageKitError):
+            self.client.upload(BytesIO(b'data'), 'avatar.jpg', 4)
+        self.assertEqual(self.server.uploads, self.client.max_retries + 1)
+
+
+class DeferredImageUploadTests(TransactionTestCase):
+    def test_deferred_upload_fills_user_image(self):
+        server = FakeImageKitServer()
+        server.start_in_thread()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        user = User.objects.create(email='smith@example.com', username='smith')
+
+        client = ImageKitClient('test-key', upload_url=server.upload_url)
+        with mock.patch('authentication.imagekit.get_imagekit_client', return_value=client):
+            future = upload_user_image_deferred(user.id, SimpleUploadedFile('avatar.png', make_image_bytes('PNG')))
+            url = future.result(timeout=10)
+
+        user.refresh_from_db()
+        self.assertEqual(user.image, url)
+
+    def test_deferred_upload_failure_is_logged(self):
+        user = User.objects.create(email='smith@example.com', username='smith', image='old.png')
+        client = mock.Mock(upload=mock.Mock(side_effect=ImageKitError('unavailable')))
+        with mock.patch('authentication.imagekit.get_imagekit_client', return_value=client), \
+                self.assertLogs('authentication.imagekit', 'ERROR') as logs:
+            future = upload_user_image_deferred(user.id, SimpleUploadedFile('avatar.png', make_image_bytes('PNG')))
+            with self.assertRaises(ImageKitError):
+                future.result(timeout=10)
+
+        self.assertIn(f'user {user.id} failed', logs.output[0])
+        user.refresh_from_db()
+        self.assertEqual(user.image, 'old.png')
+
+
+class SpecialtyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='smith@example.com', username='smith')
+
+    def test_set_user_specialties_resolves_names_in_bulk(self):
+        Specialty.objects.create(name='Design')
+        # Savepoint, lookup, insert, re-read, set() diff + insert, release.
+        with self.assertNumQueries(7):
+            set_user_specialties(self.user, [' Design', 'Writing', 'Design', ''])
+
+        self.assertEqual(sorted(self.user.specialties.values_list('name', flat=True)), ['Design', 'Writing'])
+
+    def test_purge_deletes_only_orphans(self):
+        set_user_specialties(self.user, ['Design'])
+        Specialty.objects.bulk_create([Specialty(name=f'old-{i}') for i in range(5)])
+
+        out = StringIO()
+        call_command('purge_orphan_specialties', '--batch-size', '2', stdout=out)
+
+        self.assertEqual(list(Specialty.objects.values_list('name', flat=True)), ['Design'])
+        self.assertIn('Deleted 5', out.getvalue())
+
+    def test_purge_keeps_specialty_linked_after_scan(self):
+        orphan = Specialty.objects.create(name='Orphan')
+        linked = Specialty.objects.create(name='Linked')
+        # Linked between the orphan scan and the delete.
+        self.user.specialties.add(linked)
+
+        self.assertEqual(delete_if_orphaned([orphan.pk, linked.pk]), 1)
+        self.assertEqual(list(self.user.specialties.values_list('name', flat=True)), ['Linked'])
+        self.assertFalse(Specialty.objects.filter(pk=orphan.pk).exists())
+
+
+@override_settings(AUTH_USER_CACHE_ALLOW_LOCAL=True)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        auth_user_cache.clear()
+        self.addCleanup(auth_user_cache.clear)
+        self.user = User.objects.create(email='smith@example.com', username='smith', account_type='tasksmith')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.url = reverse('get-profile')
+
+    def get_profile(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.get(self.url)
+
+    def test_user_is_served_from_cache_after_first_request(self):
+        # A full profile read is the user row plus the specialties query.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_profile().status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_profile().status_code, 200)
+
+    def test_save_invalidates_cached_user(self):
+        self.get_profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).save()
+
+        with self.assertNumQueries(2):
+            self.get_profile()
+
+    def test_soft_deleted_user_loses_access_immediately(self):
+        self.get_profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).soft_delete('admin@example.com')
+
+        self.assertEqual(self.get_profile().status_code, 401)
+
+    def test_cache_entries_expire(self):
+        self.get_profile()
+        with mock.patch.object(auth_user_cache, 'ttl', -1):
+            auth_user_cache.clear()
+            self.get_profile()
+        with self.assertNumQueries(2):
+            self.get_profile()
+
+    def test_evicted_version_token_is_a_miss(self):
+        self.get_profile()
+        cache.delete(user_version_key(self.user.pk))
+
+        with self.assertNumQueries(2):
+            self.get_profile()
+        with self.assertNumQueries(1):
+            self.get_profile()
+
+    @override_settings(AUTH_USER_CACHE_ALLOW_LOCAL=False)
+    def test_disabled_without_shared_cache(self):
+        self.get_profile()
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_profile().status_code, 200)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = User(email='smith@example.com', username='smith', phone_number='12345678901', is_verified=True)
+        self.user.set_password('pass12345')
+        self.user.save()
+
+    async def test_async_login_matches_sync_login(self):
+        payload = {'email': 'smith@example.com', 'password': 'pass12345'}
+        response = await self.async_client.post(reverse('async-login'), payload, content_type='application/json')
+        sync_response = await sync_to_async(APIClient().post)(reverse('login'), payload, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        body, sync_body = response.json(), sync_response.json()
+        self.assertEqual(AccessToken(body.pop('access'))['user_id'], self.user.id)
+        del body['refresh'], sync_body['access'], sync_body['refresh']
+        self.assertEqual(body, sync_body)
+
+    async def test_async_login_rejects_wrong_password(self):
+        response = await self.async_client.post(reverse('async-login'), {
+            'email': 'smith@example.com', 'password': 'wrong',
+        })
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['status_code'], 401)
+
+    async def test_async_register_hashes_password_and_queues_email(self):
+        response = await self.async_client.post(reverse('async-register'), {
+            'username': 'new', 'email': 'new@example.com', 'password': 'pass12345',
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        user = await User.objects.aget(email='new@example.com')
+        self.assertTrue(await sync_to_async(user.check_password)('pass12345'))
+        self.assertTrue(await EmailOutbox.objects.filter(to_email='new@example.com').aexists())
+
+    async def test_async_register_reports_validation_errors(self):
+        response = await self.async_client.post(reverse('async-register'), {
+            'username': 'smith', 'email': 'smith@example.com', 'password': 'pass12345',
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json()['errors'])
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        get_bucket_store().clear()
+        self.addCleanup(get_bucket_store().clear)
+        self.client = APIClient()
+
+    def regenerate_otp(self, email, ip='10.0.0.1'):
+        return self.client.post(reverse('regenerate-otp'), {'email': email}, REMOTE_ADDR=ip)
+
+    @override_settings(RATE_LIMITS={'otp': {'ip': '100/min', 'email': '2/min'}})
+    def test_email_bucket_limits_across_ips(self):
+        self.assertEqual(self.regenerate_otp('a@example.com', ip='10.0.0.1').status_code, 404)
+        self.assertEqual(self.regenerate_otp('A@example.com', ip='10.0.0.2').status_code, 404)
+
+        response = self.regenerate_otp('a@example.com', ip='10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.regenerate_otp('b@example.com', ip='10.0.0.3').status_code, 404)
+
+    @override_settings(RATE_LIMITS={'otp': {'ip': '2/min', 'email': '2/min'}})
+    def test_ip_bucket_limits_across_emails_without_using_email_tokens(self):
+        self.regenerate_otp('a@example.com')
+        self.regenerate_otp('b@example.com')
+        self.assertEqual(self.regenerate_otp('c@example.com').status_code, 429)
+
+        # The rejected request did not spend c@example.com's tokens.
+        self.assertEqual(self.regenerate_otp('c@example.com', ip='10.0.0.2').status_code, 404)
+        self.assertEqual(self.regenerate_otp('c@example.com', ip='10.0.0.3').status_code, 404)
+
+    @override_settings(RATE_LIMITS={'otp': {'ip': '2/min', 'email': '100/min'}})
+    def test_spoofed_forwarded_for_shares_one_bucket(self):
+        for i in range(2):
+            self.client.post(reverse('regenerate-otp'), {'email': 'a@example.com'},
+                             REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+        response = self.client.post(reverse('regenerate-otp'), {'email': 'a@example.com'},
+                                    REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.99')
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(
+        RATE_LIMITS={'otp': {'ip': '1/min', 'email': '100/min'}},
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1},
+    )
+    def test_forwarded_for_is_used_behind_trusted_proxy(self):
+        for client_ip in ('203.0.113.1', '203.0.113.2'):
+            response = self.client.post(reverse('regenerate-otp'), {'email': 'a@example.com'},
+                                        REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=client_ip)
+            self.assertEqual(response.status_code, 404)
+
+    def test_tokens_refill_over_time(self):
+        store = LocalBucketStore()
+        bucket = [('key', 2, 1.0)]
+        with mock.patch('authentication.throttling.time.monotonic', side_effect=[0, 0, 0, 0.5, 1.0]):
+            self.assertEqual(store.consume(bucket), 0)
+            self.assertEqual(store.consume(bucket), 0)
+            self.assertEqual(store.consume(bucket), 1.0)
+            self.assertEqual(store.consume(bucket), 0.5)
+            self.assertEqual(store.consume(bucket), 0)
+
+    def test_cache_store_shares_buckets(self):
+        first, second = CacheBucketStore(), CacheBucketStore()
+        self.addCleanup(cache.clear)
+        bucket = [('shared', 1, 1 / 60)]
+        self.assertEqual(first.consume(bucket), 0)
+        self.assertGreater(second.consume(bucket), 59)
+
+    @override_settings(RATE_LIMITS={'login': {'ip': '100/min', 'email': '5/min'}})
+    def test_login_benchmark_lifts_rate_limits(self):
+        out = StringIO()
+        call_command('benchmark_login', requests=8, concurrency=1, mode='wsgi', stdout=out)
+        self.assertIn('8 logins', out.getvalue())
+
+        with self.assertRaisesMessage(AssertionError, 'throttled'):
+            call_command('benchmark_login', requests=8, concurrency=1, mode='wsgi', keep_rate_limits=True,
+                         stdout=StringIO())
+
+    @override_settings(RATE_LIMITS={'login': {'ip': '100/min', 'email': '1/min'}})
+    async def test_async_login_is_throttled(self):
+        payload = {'email': 'nobody@example.com', 'password': 'pass12345'}
+        await self.async_client.post(reverse('async-login'), payload, content_type='application/json')
+        response = await self.async_client.post(reverse('async-login'), payload, content_type='application/json')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+
+class PurgeExpiredOtpsTests(TestCase):
+    def test_purge_keeps_only_active_otps(self):
+        user = User.objects.create(email='smith@example.com', username='smith')
+        later, earlier = now() + timedelta(minutes=10), now() - timedelta(minutes=1)
+        active = EmailVerification.objects.create(user=user, otp='111111', expires_at=later)
+        EmailVerification.objects.create(user=user, otp='222222', expires_at=earlier)
+        EmailVerification.objects.create(user=user, otp='333333', expires_at=later, is_used=True)
+        PasswordReset.objects.create(user=user, otp='444444', expires_at=earlier)
+
+        out = StringIO()
+        call_command('purge_expired_otps', '--batch-size', '1', stdout=out)
+
+        self.assertEqual(list(EmailVerification.objects.all()), [active])
+        self.assertFalse(PasswordReset.objects.exists())
+        self.assertIn('Deleted 2 email_verification rows.', out.getvalue())
+        self.assertIn('Deleted 1 password_reset rows.', out.getvalue())
+
+
+class UserDeletionJobTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(email='admin@example.com', username='admin', account_type='admin', phone_number='1')
+        self.users = [
+            User.objects.create(email=f'user{i}@example.com', username=f'user{i}', phone_number=f'{i + 2}')
+            for i in range(5)
+        ]
+        tag = Tags.objects.create(name='design')
+        for user in [self.admin, *self.users]:
+            task = TasksDetail.objects.create(user=user, task_title='Task', task_reward_per_completion=10)
+            task.task_tags.add(tag)
+            EmailVerification.objects.create(user=user, otp='123456', expires_at=now())
+            set_user_specialties(user, ['Design'])
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.admin)}')
+
+    def test_deletes_users_and_related_rows_in_chunks(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(reverse('delete-all-users'))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['data']['total_users'], 5)
+        self.assertEqual(len(callbacks), 1)
+
+        job = UserDeletionJob.objects.get()
+        job.batch_size = 2
+        job.save()
+        run_deletion_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted_users, job.progress), ('completed', 5, 100.0))
+        self.assertEqual(list(User.objects.all()), [self.admin])
+        self.assertEqual(list(TasksDetail.objects.values_list('user_id', flat=True)), [self.admin.id])
+        self.assertEqual(TasksDetail.task_tags.through.objects.count(), 1)
+        self.assertEqual(User.specialties.through.objects.count(), 1)
+        self.assertEqual(EmailVerification.objects.count(), 1)
+
+        progress = self.client.get(reverse('user-deletion-job', args=[job.id]))
+        self.assertEqual(progress.json()['data']['status'], 'completed')
+
+    def test_soft_deleted_users_are_kept(self):
+        self.users[0].soft_delete('admin@example.com')
+        job = create_deletion_job('admin@example.com', keep_user_id=self.admin.id, batch_size=2)
+        self.assertEqual(job.total_users, 4)
+        run_deletion_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted_users, job.progress), ('completed', 4, 100.0))
+        self.assertEqual(sorted(User.all_objects.values_list('pk', flat=True)), [self.admin.id, self.users[0].id])
+        self.assertTrue(TasksDetail.all_objects.filter(user=self.users[0]).exists())
+
+    def test_job_resumes_after_interruption(self):
+        job = create_deletion_job('admin@example.com', keep_user_id=self.admin.id, batch_size=2)
+        delete_next_chunk(job)
+        self.assertEqual(User.objects.count(), 4)
+
+        call_command('delete_users', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted_users), ('completed', 5))
+        self.assertEqual(list(User.objects.all()), [self.admin])
+
+    def test_running_job_blocks_new_one_until_stale(self):
+        job = create_deletion_job('admin@example.com', keep_user_id=self.admin.id)
+        UserDeletionJob.objects.filter(pk=job.pk).update(status='running')
+        self.assertEqual(self.client.delete(reverse('delete-all-users')).status_code, 409)
+
+        UserDeletionJob.objects.filter(pk=job.pk).update(updated_at=now() - timedelta(hours=1))
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.delete(reverse('delete-all-users'))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['data']['id'], job.id)
+        self.assertEqual(len(callbacks), 1)
+        # The claim refreshed the heartbeat, so a second request is refused.
+        self.assertEqual(self.client.delete(reverse('delete-all-users')).status_code, 409)
+        self.assertEqual(UserDeletionJob.objects.count(), 1)
+
+    def test_chunks_invalidate_marketplace_and_search(self):
+        TasksDetail.objects.filter(user=self.users[0]).update(task_status='approved')
+        backend = get_search_backend()
+        self.addCleanup(backend.reset)
+        backend.search(self.users[0].id, 'task', limit=10)
+        version = get_marketplace_version()
+
+        job = create_deletion_job('admin@example.com', keep_user_id=self.admin.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_next_chunk(job)
+
+        self.assertGreater(get_marketplace_version(), version)
+        self.assertEqual(backend.search(self.users[0].id, 'task', limit=10), [])
+
+    def test_requires_admin(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.users[0])}')
+        self.assertEqual(self.client.delete(reverse('delete-all-users')).status_code, 403)
+        self.assertEqual(User.objects.count(), 6)
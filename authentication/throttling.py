@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse "<requests>/<period>" (e.g. "5/min") into (capacity, tokens per second).
+    """
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / DURATIONS[period]
+
+
+def take(state, capacity, refill_rate, current_time):
+    """
+    Refill a (tokens, updated_at) bucket state up to `current_time`.
+
+    Returns the refilled state and the seconds until one token is available
+    (0 when a request can be let through now).
+    """
+    if state is None:
+        tokens = float(capacity)
+    else:
+        tokens, updated_at = state
+        tokens = min(capacity, tokens + max(0.0, current_time - updated_at) * refill_rate)
+    wait = 0.0 if tokens >= 1 else (1 - tokens) / refill_rate
+    return (tokens, current_time), wait
+
+
+class LocalBucketStore:
+    """
+    Token buckets kept in this process, evicting the least recently used.
+
+    Each worker process limits on its own, so the effective limit is the
+    configured rate times the number of workers.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, buckets):
+        """
+        Take one token from every (key, capacity, refill_rate) bucket, or
+        from none of them. Returns 0 if allowed, otherwise seconds to wait.
+        """
+        current_time = time.monotonic()
+        with self._lock:
+            refilled = []
+            longest_wait = 0.0
+            for key, capacity, refill_rate in buckets:
+                state, wait = take(self._buckets.get(key), capacity, refill_rate, current_time)
+                refilled.append((key, state))
+                longest_wait = max(longest_wait, wait)
+
+            for key, (tokens, updated_at) in refilled:
+                self._buckets[key] = (tokens if longest_wait else tokens - 1, updated_at)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return longest_wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Token buckets in a Django cache, shared by every worker using it.
+
+    Costs one get_many plus one set per bucket for each request. Point
+    RATE_LIMIT_CACHE at a Redis/Memcached cache, or at a DatabaseCache to
+    keep buckets in the database. Concurrent requests for the same key may both read a bucket
+    before either writes it back, so a burst can overshoot by the number of
+    racing requests.
+    """
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+    def consume(self, buckets):
+        current_time = time.time()
+        keys = [f'ratelimit:{key}' for key, capacity, refill_rate in buckets]
+        states = self.cache.get_many(keys)
+
+        refilled = {}
+        longest_wait = 0.0
+        for cache_key, (key, capacity, refill_rate) in zip(keys, buckets):
+            state, wait = take(states.get(cache_key), capacity, refill_rate, current_time)
+            refilled[cache_key] = (state, capacity / refill_rate)
+            longest_wait = max(longest_wait, wait)
+
+        if not longest_wait:
+            # A bucket untouched for a full period is back at capacity, so it
+            # can expire then.
+            for cache_key, ((tokens, updated_at), timeout) in refilled.items():
+                self.cache.set(cache_key, (tokens - 1, updated_at), timeout=int(timeout) + 1)
+        return longest_wait
+
+
+_store = None
+_lock = threading.Lock()
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = import_string(getattr(settings, 'RATE_LIMIT_STORE', 'authentication.throttling.LocalBucketStore'))()
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token-bucket limit per client IP and per submitted email address.
+
+    Set `throttle_scope` on the view; rates come from RATE_LIMITS[scope],
+    e.g. {'ip': '20/min', 'email': '5/min'}. A request is let through only
+    if both buckets have a token, and a rejected request uses up neither,
+    so a throttled address does not lock out the real owner's email.
+    """
+
+    def allow_request(self, request, view):
+        rates = getattr(settings, 'RATE_LIMITS', {}).get(getattr(view, 'throttle_scope', None))
+        if not rates:
+            return True
+
+        scope = view.throttle_scope
+        buckets = []
+        if rates.get('ip'):
+            buckets.append((f'{scope}:ip:{self.get_ident(request)}', *parse_rate(rates['ip'])))
+        email = self.get_email(request, view)
+        if rates.get('email') and email:
+            buckets.append((f'{scope}:email:{email}', *parse_rate(rates['email'])))
+
+        self.wait_seconds = get_bucket_store().consume(buckets)
+        return not self.wait_seconds
+
+    def get_ident(self, request):
+        """
+        The client IP. Without NUM_PROXIES, DRF would key on X-Forwarded-For
+        as sent, letting a client get a fresh bucket per request by spoofing it.
+        """
+        if not api_settings.NUM_PROXIES:
+            return request.META.get('REMOTE_ADDR')
+        return super().get_ident(request)
+
+    def get_email(self, request, view):
+        data = request.data if hasattr(request, 'data') else getattr(view, 'data', {})
+        email = data.get('email') if hasattr(data, 'get') else None
+        return email.strip().lower() if isinstance(email, str) else None
+
+    def wait(self):
+        return self.wait_seconds
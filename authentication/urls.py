@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('health-check/', views.HealthCheckView.as_view(), name='health_check'),
@@ -8,6 +8,9 @@ urlpatterns = [
     path('regenerate-otp/', views.RegenerateOtpView.as_view(), name='regenerate-otp'),
     path('login/', views.LoginView.as_view(), name='login'),
     path('delete-all-users/', views.DeleteAllUsersAPIView.as_view(), name='delete-all-users'),
+    path('delete-all-users/<int:job_id>/', views.UserDeletionJobView.as_view(), name='user-deletion-job'),
     path('password-reset-request/', views.PasswordResetRequestView.as_view(), name='password_reset_request'),
     path('password-reset-confirm/', views.PasswordResetConfirmView.as_view(), name='password_reset_confirm'),
+    path('async/register/', async_views.AsyncRegisterView.as_view(), name='async-register'),
+    path('async/login/', async_views.AsyncLoginView.as_view(), name='async-login'),
 ]
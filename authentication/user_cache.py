@@ -0,0 +1,116 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from copy import copy
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+GLOBAL_VERSION_KEY = 'auth-user:version'
+
+
+def user_version_key(user_id):
+    return f'auth-user:version:{user_id}'
+
+
+def get_user_version(user_id):
+    """
+    Return the current (global, per-user) version tokens for `user_id`.
+
+    Versions live in the shared Django cache so a write in one worker
+    invalidates cached users in every worker. A missing token (never set, or
+    evicted) is replaced by a fresh one, so users cached under the old token
+    never match again. Cost: one cache round trip, two when a token is missing.
+    """
+    keys = [GLOBAL_VERSION_KEY, user_version_key(user_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            versions[key] = cache.get(key)
+    return versions[GLOBAL_VERSION_KEY], versions[user_version_key(user_id)]
+
+
+def version_cache_is_shared():
+    """
+    Whether the version tokens are visible to every worker process.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def invalidate_cached_user(user_id):
+    """
+    Invalidate every worker's cached copy of the user once the current
+    transaction commits.
+    """
+    transaction.on_commit(lambda: cache.set(user_version_key(user_id), uuid.uuid4().hex, timeout=None))
+
+
+def invalidate_all_cached_users():
+    transaction.on_commit(lambda: cache.set(GLOBAL_VERSION_KEY, uuid.uuid4().hex, timeout=None))
+
+
+class AuthUserCache:
+    """
+    Bounded LRU of authenticated User rows with a TTL, validated against the
+    shared version tokens on every hit.
+
+    Disabled when the default cache is per-process, since other workers
+    would then never see an invalidation, unless AUTH_USER_CACHE_ALLOW_LOCAL
+    is set for a single-process deployment.
+    """
+
+    def __init__(self, max_size=10000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enabled(self):
+        return getattr(settings, 'AUTH_USER_CACHE_ALLOW_LOCAL', False) or version_cache_is_shared()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+
+        user, version, expires_at = entry
+        if expires_at < time.monotonic() or version != get_user_version(user_id):
+            with self._lock:
+                if self._entries.get(user_id) is entry:
+                    del self._entries[user_id]
+            return None
+
+        with self._lock:
+            if user_id in self._entries:
+                self._entries.move_to_end(user_id)
+        # Each request gets its own instance, so mutations don't leak.
+        return copy(user)
+
+    def set(self, user_id, user, version):
+        """
+        Cache `user`; `version` must be read before the user was fetched.
+        """
+        # The cache could not hold a token (e.g. DummyCache).
+        if None in version:
+            return
+        with self._lock:
+            self._entries[user_id] = (copy(user), version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+auth_user_cache = AuthUserCache(
+    max_size=getattr(settings, 'AUTH_USER_CACHE_MAX_SIZE', 10000),
+    ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 60),
+)
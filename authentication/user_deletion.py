@@ -0,0 +1,186 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Max
+from django.utils.timezone import now
+
+from .models import User, UserDeletionJob
+from .user_cache import invalidate_all_cached_users
+from tasksmith.helpers import invalidate_marketplace
+from tasksmith.search import get_search_backend
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def cascade_statements(model, where, params):
+    """
+    Return (sql, params) statements deleting the rows of `model` matching
+    the SQL condition `where`, children first.
+
+    This follows the same relations as Model.delete() (reverse CASCADE and
+    SET_NULL foreign keys, and M2M link rows), but the deletes run in the
+    database as subqueries instead of loading every related row into Python.
+    Signals and Model.delete() overrides are skipped.
+    """
+    qn = connection.ops.quote_name
+    opts = model._meta
+    table = qn(opts.db_table)
+    selected = f'SELECT {qn(opts.pk.column)} FROM {table} WHERE {where}'
+    statements = []
+
+    for field in opts.many_to_many:
+        through = field.remote_field.through
+        if through._meta.auto_created:
+            statements.append((
+                f'DELETE FROM {qn(through._meta.db_table)} WHERE {qn(field.m2m_column_name())} IN ({selected})',
+                params,
+            ))
+
+    for relation in opts.related_objects:
+        related = relation.related_model._meta
+        if relation.many_to_many:
+            through = relation.through
+            if through._meta.auto_created:
+                statements.append((
+                    f'DELETE FROM {qn(through._meta.db_table)} '
+                    f'WHERE {qn(relation.field.m2m_reverse_name())} IN ({selected})',
+                    params,
+                ))
+        elif relation.on_delete is models.CASCADE:
+            statements += cascade_statements(
+                relation.related_model, f'{qn(relation.field.column)} IN ({selected})', params,
+            )
+        elif relation.on_delete is models.SET_NULL:
+            column = qn(relation.field.column)
+            statements.append((
+                f'UPDATE {qn(related.db_table)} SET {column} = NULL WHERE {column} IN ({selected})',
+                params,
+            ))
+        elif relation.on_delete is not models.DO_NOTHING:
+            raise ValueError(f'Unsupported on_delete for {related.label}.{relation.field.name}.')
+
+    statements.append((f'DELETE FROM {table} WHERE {where}', params))
+    return statements
+
+
+def create_deletion_job(requested_by, keep_user_id=None, batch_size=500):
+    # Soft-deleted users are kept, as User.objects.all().delete() did.
+    users = User.objects.exclude(pk=keep_user_id)
+    return UserDeletionJob.objects.create(
+        requested_by=requested_by,
+        keep_user_id=keep_user_id,
+        batch_size=batch_size,
+        max_user_id=users.aggregate(max_id=Max('pk'))['max_id'] or 0,
+        total_users=users.count(),
+    )
+
+
+def delete_next_chunk(job):
+    """
+    Delete the next `job.batch_size` users and their related rows, and save
+    the job's progress in the same transaction. Returns False when done.
+    """
+    with transaction.atomic():
+        # Serializes runners of one job, e.g. a runner thought dead whose job
+        # was resumed elsewhere, and picks up the progress either committed.
+        locked = UserDeletionJob.objects.select_for_update().get(pk=job.pk)
+        job.last_user_id, job.deleted_users = locked.last_user_id, locked.deleted_users
+        if job.last_user_id >= job.max_user_id:
+            return False
+
+        user_ids = list(
+            User.objects.filter(pk__gt=job.last_user_id, pk__lte=job.max_user_id)
+            .exclude(pk=job.keep_user_id).order_by('pk')
+            .values_list('pk', flat=True)[:job.batch_size]
+        )
+        upper = user_ids[-1] if len(user_ids) == job.batch_size else job.max_user_id
+
+        qn = connection.ops.quote_name
+        where = (
+            f'{qn(User._meta.pk.column)} > %s AND {qn(User._meta.pk.column)} <= %s '
+            f'AND {qn(User._meta.get_field("deleted_at").column)} IS NULL'
+        )
+        params = [job.last_user_id, upper]
+        if job.keep_user_id is not None:
+            where += f' AND {qn(User._meta.pk.column)} <> %s'
+            params.append(job.keep_user_id)
+
+        with connection.cursor() as cursor:
+            for sql, statement_params in cascade_statements(User, where, params):
+                cursor.execute(sql, statement_params)
+            deleted = cursor.rowcount
+
+        job.last_user_id = upper
+        job.deleted_users += deleted
+        job.save(update_fields=['last_user_id', 'deleted_users', 'updated_at'])
+        # The raw deletes skip the hooks that task writes go through.
+        invalidate_all_cached_users()
+        invalidate_marketplace('approved')
+        get_search_backend().remove_users(user_ids)
+    return True
+
+
+def claim_stale_job(job):
+    """
+    Take over a pending or running `job` whose progress has not been saved
+    for USER_DELETION_STALE_AFTER seconds, e.g. because the process running
+    it died. Returns True if this caller claimed it and should resume it.
+    """
+    stale_before = now() - timedelta(seconds=getattr(settings, 'USER_DELETION_STALE_AFTER', 600))
+    if job.updated_at >= stale_before:
+        return False
+    # Only one of several concurrent callers matches the old updated_at.
+    claimed = UserDeletionJob.objects.filter(pk=job.pk, updated_at=job.updated_at).update(updated_at=now())
+    return bool(claimed)
+
+
+def run_deletion_job(job_id):
+    """
+    Run (or resume) a deletion job to completion in the calling thread.
+    """
+    job = UserDeletionJob.objects.get(pk=job_id)
+    if job.status == 'completed':
+        return job
+
+    job.status = 'running'
+    job.started_at = job.started_at or now()
+    job.save(update_fields=['status', 'started_at', 'updated_at'])
+    try:
+        while delete_next_chunk(job):
+            logger.info('User deletion job %s: %s/%s users deleted', job.pk, job.deleted_users, job.total_users)
+    except Exception as error:
+        logger.exception('User deletion job %s failed', job.pk)
+        job.status = 'failed'
+        job.error = str(error)[:2000]
+    else:
+        job.status = 'completed'
+    job.finished_at = now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    return job
+
+
+def start_deletion_job(job_id):
+    """
+    Run the job on a background thread. Returns the Future.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='user-deletion')
+
+    def run():
+        try:
+            return run_deletion_job(job_id)
+        finally:
+            # This worker thread opened its own DB connection.
+            connection.close()
+
+    return _executor.submit(run)
@@ -3,9 +3,10 @@ from rest_framework.views import APIView
 from django.core.exceptions import ValidationError
 # import secrets
 # from datetime import timedelta
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import User, EmailVerification
+from .models import User, EmailVerification, UserDeletionJob
+from .permissions import IsAdmin
 # from .models import User, EmailVerification, PasswordReset
 from django.utils.timezone import now
 # from django.template.loader import render_to_string
@@ -17,6 +18,8 @@ from django.core.validators import validate_email
 # from .helpers import generate_otp, send_email
 from .helpers import send_email, generate_unique_phone
 from .serializers import RegisterSerializer, PasswordResetConfirmSerializer
+from .throttling import TokenBucketThrottle
+from .user_deletion import claim_stale_job, create_deletion_job, start_deletion_job
 from django.utils import timezone
 
 # Create your views here.
@@ -74,6 +77,8 @@ class VerifyEmailView(APIView):
     API view for verifying a user's email using an OTP.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'verify_email'
 
     def post(self, request):
         email = request.data.get('email')
@@ -132,6 +137,8 @@ class VerifyEmailView(APIView):
 
 class RegenerateOtpView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'otp'
 
     def post(self, request):
         email = request.data.get('email')
@@ -190,6 +197,8 @@ class LoginView(APIView):
     API view for authenticating users and returning JWT tokens upon successful login.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login'
 
     def post(self, request):
         email = request.data.get('email')
@@ -266,6 +275,8 @@ class LoginView(APIView):
 # forgot password reset views:
 class PasswordResetRequestView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'password_reset'
 
     def post(self, request):
         email = request.data.get('email')
@@ -332,13 +343,66 @@ class PasswordResetConfirmView(APIView):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 class DeleteAllUsersAPIView(APIView):
-    permission_classes = [AllowAny]
+    """
+    Starts a background job deleting every user except the requesting admin,
+    in primary key chunks (see authentication.user_deletion). A job that has
+    stopped making progress is resumed instead.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
 
     def delete(self, request, *args, **kwargs):
-        count = User.objects.count()
-        User.objects.all().delete()
+        active_job = UserDeletionJob.objects.filter(status__in=['pending', 'running']).order_by('-id').first()
+        if active_job and claim_stale_job(active_job):
+            transaction.on_commit(lambda: start_deletion_job(active_job.id))
+            return Response({
+                "status_code": 202,
+                "message": "A stalled user deletion job has been resumed.",
+                "data": serialize_deletion_job(active_job)
+            }, status=status.HTTP_202_ACCEPTED)
+        if active_job:
+            return Response({
+                "status_code": 409,
+                "message": "A user deletion job is already in progress.",
+                "data": serialize_deletion_job(active_job)
+            }, status=status.HTTP_409_CONFLICT)
+
+        with transaction.atomic():
+            job = create_deletion_job(request.user.email, keep_user_id=request.user.id)
+            transaction.on_commit(lambda: start_deletion_job(job.id))
+
+        return Response({
+            "status_code": 202,
+            "message": f"Deletion of {job.total_users} users has started.",
+            "data": serialize_deletion_job(job)
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class UserDeletionJobView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, job_id):
+        job = UserDeletionJob.objects.filter(pk=job_id).first()
+        if not job:
+            return Response({
+                "status_code": 404,
+                "message": "User deletion job not found."
+            }, status=status.HTTP_404_NOT_FOUND)
 
         return Response({
             "status_code": 200,
-            "message": f"All {count} users deleted successfully."
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+            "message": f"User deletion job is {job.status}.",
+            "data": serialize_deletion_job(job)
+        }, status=status.HTTP_200_OK)
+
+
+def serialize_deletion_job(job):
+    return {
+        'id': job.id,
+        'status': job.status,
+        'total_users': job.total_users,
+        'deleted_users': job.deleted_users,
+        'progress': job.progress,
+        'error': job.error,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
@@ -0,0 +1,308 @@
+"""
+Prometheus metrics for requests and database queries.
+
+MetricsMiddleware records, per URL name, request counts by status, latency
+and response size histograms, and the number and duration of DB queries.
+The same query hook feeds the slow-query log (backend.slow_queries).
+`metrics_view` serves them in the Prometheus text format to scrapers
+presenting METRICS_TOKEN as a bearer token.
+
+Recording is lock-free: every thread writes to its own shard, and shards
+are only summed when metrics are scraped. With several worker processes,
+set METRICS_DIR to a directory shared by the workers (and emptied on
+deploy); each process then writes its totals there every
+METRICS_FLUSH_INTERVAL seconds and a scrape of any worker sums them all.
+"""
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+from . import slow_queries
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by URL name, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Request latency in seconds.'),
+    'http_response_size_bytes': ('histogram', 'Response body size in bytes.'),
+    'db_queries_per_request': ('histogram', 'Database queries issued per request.'),
+    'db_queries_total': ('counter', 'Database queries issued.'),
+    'db_query_duration_seconds_total': ('counter', 'Seconds spent executing database queries.'),
+}
+HISTOGRAM_BUCKETS = {
+    'http_request_duration_seconds': LATENCY_BUCKETS,
+    'http_response_size_bytes': SIZE_BUCKETS,
+    'db_queries_per_request': QUERY_COUNT_BUCKETS,
+}
+
+
+class Shard:
+    def __init__(self):
+        self.counters = {}
+        # {(name, labels): [count per bucket..., +Inf count, sum, count]}
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        bounds = HISTOGRAM_BUCKETS[name]
+        key = (name, labels)
+        values = self.histograms.get(key)
+        if values is None:
+            values = self.histograms[key] = [0] * (len(bounds) + 3)
+        values[bisect_left(bounds, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+
+def merge(totals, counters, histograms):
+    total_counters, total_histograms = totals
+    for key, value in counters:
+        total_counters[key] = total_counters.get(key, 0) + value
+    for key, values in histograms:
+        merged = total_histograms.get(key)
+        if merged is None:
+            total_histograms[key] = list(values)
+        else:
+            total_histograms[key] = [a + b for a, b in zip(merged, values)]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._pid = os.getpid()
+            self._name = f'{self._pid}-{uuid.uuid4().hex[:8]}.json'
+            self._local = threading.local()
+            self._shards = []
+            self._next_flush = 0.0
+
+    def shard(self):
+        if self._pid != os.getpid():
+            # Forked after recording started; the parent keeps its own totals.
+            self.reset()
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def totals(self):
+        """
+        Sum of every thread's shard in this process.
+        """
+        totals = ({}, {})
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # dict() copies are atomic under the GIL, so no writer lock is needed.
+            merge(totals, dict(shard.counters).items(), dict(shard.histograms).items())
+        return totals
+
+    def maybe_flush(self):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory or time.monotonic() < self._next_flush:
+            return
+        # Whichever request thread gets here first flushes; the rest move on.
+        if self._flush_lock.acquire(blocking=False):
+            try:
+                self._next_flush = time.monotonic() + getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+                self.flush(directory)
+            finally:
+                self._flush_lock.release()
+
+    def flush(self, directory):
+        counters, histograms = self.totals()
+        data = {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, values] for (name, labels), values in histograms.items()],
+        }
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self._name)
+        with open(path + '.tmp', 'w') as output:
+            json.dump(data, output)
+        os.replace(path + '.tmp', path)
+
+    def collect(self):
+        """
+        Totals for this process plus every other process in METRICS_DIR.
+        """
+        totals = self.totals()
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if directory and os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                if not filename.endswith('.json') or filename == self._name:
+                    continue
+                try:
+                    with open(os.path.join(directory, filename)) as source:
+                        data = json.load(source)
+                except (OSError, ValueError):
+                    continue
+                merge(
+                    totals,
+                    (((name, tuple(map(tuple, labels))), value) for name, labels, value in data['counters']),
+                    (((name, tuple(map(tuple, labels))), values) for name, labels, values in data['histograms']),
+                )
+        return totals
+
+
+registry = Registry()
+
+
+def format_labels(labels):
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(totals):
+    counters, histograms = totals
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+            continue
+
+        bounds = HISTOGRAM_BUCKETS[name]
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(bounds + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {format_value(values[-2])}')
+            lines.append(f'{name}_count{format_labels(labels)} {values[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryStats:
+    __slots__ = ('request', 'count', 'duration')
+
+    def __init__(self, request=None):
+        self.request = request
+        self.count = 0
+        self.duration = 0.0
+
+
+# Stats of the request being handled. A ContextVar follows the request into
+# the sync_to_async threads async views run their queries in.
+current_query_stats = ContextVar('current_query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_query_stats.get()
+    threshold = slow_queries.get_threshold()
+    if stats is None and threshold is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        result = execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if stats is not None:
+            stats.count += 1
+            stats.duration += duration
+    if threshold is not None and duration >= threshold:
+        slow_queries.report(sql, params, many, context, duration, stats.request if stats else None)
+    return result
+
+
+def instrument(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(instrument, dispatch_uid='backend.metrics.instrument')
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        # Connections opened before this module was imported missed the signal.
+        instrument(connection)
+        stats = QueryStats(request)
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = QueryStats(request)
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    def record(self, request, response, duration, stats):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        shard = registry.shard()
+        shard.inc('http_requests_total', (('view', view), ('method', request.method), ('status', str(response.status_code))))
+        shard.observe('http_request_duration_seconds', (('view', view), ('method', request.method)), duration)
+        if not response.streaming:
+            shard.observe('http_response_size_bytes', (('view', view),), len(response.content))
+        shard.observe('db_queries_per_request', (('view', view),), stats.count)
+        if stats.count:
+            shard.inc('db_queries_total', (('view', view),), stats.count)
+            shard.inc('db_query_duration_seconds_total', (('view', view),), stats.duration)
+        registry.maybe_flush()
+
+
+def metrics_view(request):
+    # Off until a token is configured: the metrics describe traffic and DB
+    # time per view.
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if not token or scheme.lower() != 'bearer' or not hmac.compare_digest(credentials.encode(), token.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(render(registry.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
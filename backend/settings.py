@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -150,14 +151,113 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 
+# Queue outgoing email in the email_outbox table for `manage.py deliver_emails`
+# instead of sending it inside the request.
+EMAIL_OUTBOX_ENABLED = os.getenv("EMAIL_OUTBOX_ENABLED", "True") == "True"
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.CachedJWTAuthentication',
     ],
+    # Reverse proxies in front of the app. Throttles key on REMOTE_ADDR when
+    # this is 0, and on the address the outermost proxy saw otherwise.
+    'NUM_PROXIES': int(os.getenv("NUM_PROXIES", "0")),
+}
+
+# Shared cache for invalidation tokens, rate limits and marketplace pages.
+# Without CACHE_URL each worker process gets its own LocMemCache.
+CACHE_URL = os.getenv("CACHE_URL")
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+
+# Per-process cache of authenticated users (see authentication.user_cache).
+# Invalidation tokens live in the default cache, so the user cache is off
+# unless that cache is shared between workers (e.g. CACHE_URL is set), or
+# AUTH_USER_CACHE_ALLOW_LOCAL opts a single-process deployment in.
+AUTH_USER_CACHE_ALLOW_LOCAL = os.getenv("AUTH_USER_CACHE_ALLOW_LOCAL", "False") == "True"
+AUTH_USER_CACHE_TTL = 60
+AUTH_USER_CACHE_MAX_SIZE = 10000
+
+# Request and query metrics served at /metrics/ (see backend.metrics) to
+# scrapers sending "Authorization: Bearer <METRICS_TOKEN>"; unset disables
+# the endpoint. With several worker processes, point METRICS_DIR at a
+# directory they share.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = 5
+
+# Queries slower than this are logged with their view and SQL fingerprint
+# (see backend.slow_queries); None turns the log off. SLOW_QUERY_EXPLAIN
+# also captures the plan of slow SELECTs.
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "False") == "True"
+SLOW_QUERY_EXPLAIN_INTERVAL = 60
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", str(BASE_DIR / 'logs' / 'slow_queries-{pid}.log'))
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 2 ** 20
+SLOW_QUERY_LOG_BACKUP_COUNT = 5
+
+# Token-bucket limits for the unauthenticated auth endpoints, per client IP
+# and per submitted email ("<requests>/<s|min|hour|day>", refilled evenly).
+# LocalBucketStore limits each worker process separately; use
+# CacheBucketStore with a shared RATE_LIMIT_CACHE to limit across workers.
+RATE_LIMITS = {
+    'login': {'ip': '20/min', 'email': '5/min'},
+    'otp': {'ip': '10/min', 'email': '3/min'},
+    'password_reset': {'ip': '10/min', 'email': '3/min'},
+    'verify_email': {'ip': '20/min', 'email': '5/min'},
 }
+RATE_LIMIT_STORE = 'authentication.throttling.LocalBucketStore'
+RATE_LIMIT_CACHE = 'default'
+
+# Threads reserved for password hashing in the async views (see
+# authentication.async_api). Unset uses one per CPU.
+PASSWORD_HASHING_WORKERS = None
+
+# A pending or running user deletion job whose progress has not been saved
+# for this many seconds is treated as dead and resumed by the next
+# delete-all-users request.
+USER_DELETION_STALE_AFTER = 600
+
+# Dotted path of the task search backend. Unset picks PostgresSearchBackend on
+# PostgreSQL and the in-process InMemorySearchBackend elsewhere.
+TASK_SEARCH_BACKEND = os.getenv("TASK_SEARCH_BACKEND")
+# Users whose postings InMemorySearchBackend keeps, least recently searched
+# evicted first.
+TASK_SEARCH_MEMORY_MAX_USERS = 1000
+
+# Seconds a marketplace feed page stays cached. Pages are also invalidated on
+# approved-task writes; use a shared cache backend so that reaches every worker.
+MARKETPLACE_CACHE_TIMEOUT = 30
+
+# Tasks read (and their tags and requirements fetched) per chunk by the
+# streaming task export.
+TASK_EXPORT_CHUNK_SIZE = 1000
+
+# ImageKit uploads. IMAGEKIT_UPLOAD_URL can point at `manage.py fake_imagekit`
+# for offline runs; "deferred" mode returns before the upload finishes and
+# fills User.image in the background.
+IMAGEKIT_UPLOAD_URL = os.getenv("IMAGEKIT_UPLOAD_URL")
+IMAGEKIT_UPLOAD_MODE = os.getenv("IMAGEKIT_UPLOAD_MODE", "sync")
+IMAGEKIT_CONNECT_TIMEOUT = 3.05
+IMAGEKIT_READ_TIMEOUT = 30
+IMAGEKIT_DEFERRED_WORKERS = 4
+
+# Profile images are validated, stripped of metadata, downscaled and
+# re-encoded in a process pool before upload (requires Pillow).
+AVATAR_PROCESSING_ENABLED = True
+AVATAR_MAX_SIZE = (512, 512)
+AVATAR_FORMAT = 'WEBP'
+AVATAR_QUALITY = 82
+IMAGE_PROCESSING_WORKERS = 2
+IMAGE_PROCESSING_TIMEOUT = 20
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
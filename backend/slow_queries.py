@@ -0,0 +1,191 @@
+"""
+Slow-query log.
+
+Queries slower than SLOW_QUERY_THRESHOLD_MS are reported by the query hook
+in backend.metrics together with the URL name of the view that issued them
+and a fingerprint of the SQL, so the same query shape groups together
+whatever its parameters. With SLOW_QUERY_EXPLAIN, the plan of slow SELECTs
+is captured too, at most once per fingerprint every
+SLOW_QUERY_EXPLAIN_INTERVAL seconds.
+
+Entries are appended as JSON lines to SLOW_QUERY_LOG_FILE (rotated by size;
+"{pid}" in the name gives each worker process its own file) and the most
+recent ones are kept in memory for SlowQueryView.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from authentication.permissions import IsAdmin
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+_explaining = ContextVar('explaining_slow_query', default=False)
+_lock = threading.Lock()
+_recent = deque(maxlen=200)
+_summary = {}
+_last_explained = {}
+_file_logger = logging.getLogger('backend.slow_queries.file')
+_file_logger.propagate = False
+_file_logger.setLevel(logging.INFO)
+_log_path = None
+
+
+def get_threshold():
+    """
+    Threshold in seconds, or None when the slow-query log is off.
+    """
+    threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+    if threshold_ms is None or _explaining.get():
+        return None
+    return threshold_ms / 1000
+
+
+def fingerprint(sql):
+    """
+    Normalize `sql` so queries differing only in literal values or the
+    length of an IN list share one fingerprint.
+    """
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql.replace('%s', '?'))
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def explain(connection, sql, params):
+    token = _explaining.set(True)
+    try:
+        # A savepoint keeps a failed EXPLAIN from aborting the caller's transaction.
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+    except Exception as error:
+        return f'EXPLAIN failed: {error}'
+    finally:
+        _explaining.reset(token)
+
+
+def should_explain(fingerprint_id, is_select):
+    if not is_select or not getattr(settings, 'SLOW_QUERY_EXPLAIN', False):
+        return False
+    current_time = time.monotonic()
+    interval = getattr(settings, 'SLOW_QUERY_EXPLAIN_INTERVAL', 60)
+    with _lock:
+        if current_time - _last_explained.get(fingerprint_id, float('-inf')) < interval:
+            return False
+        _last_explained[fingerprint_id] = current_time
+    return True
+
+
+def report(sql, params, many, context, duration, request=None):
+    """
+    Record one slow query. Called by the execute wrapper after it ran.
+    """
+    normalized = fingerprint(sql)
+    fingerprint_id = hashlib.md5(normalized.encode()).hexdigest()[:12]
+    match = getattr(request, 'resolver_match', None) if request is not None else None
+    entry = {
+        'time': now().isoformat(),
+        'duration_ms': round(duration * 1000, 2),
+        'view': (match.url_name or match.view_name) if match else None,
+        'path': request.path if request is not None else None,
+        'fingerprint_id': fingerprint_id,
+        'fingerprint': normalized[:2000],
+        'sql': sql[:2000],
+        'plan': None,
+    }
+    if not many and should_explain(fingerprint_id, sql.lstrip()[:6].upper() == 'SELECT'):
+        entry['plan'] = explain(context['connection'], sql, params)
+
+    with _lock:
+        _recent.append(entry)
+        summary = _summary.get(fingerprint_id)
+        if summary is None:
+            summary = _summary[fingerprint_id] = {
+                'fingerprint_id': fingerprint_id, 'fingerprint': entry['fingerprint'],
+                'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': [], 'plan': None,
+            }
+        summary['count'] += 1
+        summary['total_ms'] = round(summary['total_ms'] + entry['duration_ms'], 2)
+        summary['max_ms'] = max(summary['max_ms'], entry['duration_ms'])
+        if entry['view'] and entry['view'] not in summary['views']:
+            summary['views'].append(entry['view'])
+        summary['plan'] = entry['plan'] or summary['plan']
+
+    try:
+        get_file_logger().info(json.dumps(entry))
+    except OSError:
+        logger.exception('Could not write the slow-query log.')
+
+
+def get_file_logger():
+    global _log_path
+    path = getattr(settings, 'SLOW_QUERY_LOG_FILE', None)
+    path = str(path).replace('{pid}', str(os.getpid())) if path else None
+    if path != _log_path:
+        with _lock:
+            if path != _log_path:
+                for handler in list(_file_logger.handlers):
+                    _file_logger.removeHandler(handler)
+                    handler.close()
+                if path:
+                    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                    handler = RotatingFileHandler(
+                        path,
+                        maxBytes=getattr(settings, 'SLOW_QUERY_LOG_MAX_BYTES', 10 * 2 ** 20),
+                        backupCount=getattr(settings, 'SLOW_QUERY_LOG_BACKUP_COUNT', 5),
+                    )
+                    handler.setFormatter(logging.Formatter('%(message)s'))
+                    _file_logger.addHandler(handler)
+                _log_path = path
+    return _file_logger
+
+
+def reset():
+    with _lock:
+        _recent.clear()
+        _summary.clear()
+        _last_explained.clear()
+
+
+class SlowQueryView(APIView):
+    """
+    Slow queries seen by this worker process: the most recent ones and a
+    summary per fingerprint, slowest total time first.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        with _lock:
+            recent = list(reversed(_recent))
+            summary = sorted((dict(item) for item in _summary.values()), key=lambda item: -item['total_ms'])
+
+        return Response({
+            'status_code': 200,
+            'message': 'Slow queries retrieved successfully.',
+            'data': {
+                'threshold_ms': getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None),
+                'fingerprints': summary,
+                'recent': recent,
+            }
+        }, status=status.HTTP_200_OK)
@@ -17,8 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+from .slow_queries import SlowQueryView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('authentication/api/', include('authentication.urls')),
     path('tasksmith/api/', include('tasksmith.urls')),
+    path('metrics/', metrics_view, name='metrics'),
+    path('debug/slow-queries/', SlowQueryView.as_view(), name='slow-queries'),
 ]
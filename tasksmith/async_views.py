@@ -0,0 +1,92 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404
+from rest_framework import status
+
+from authentication.async_api import AsyncAPIView, get_list, run_in_executor
+from authentication.helpers import upload_to_imagekit, set_user_specialties
+from authentication.imagekit import get_upload_executor, upload_user_image_deferred
+from authentication.models import User
+
+# Async counterparts of the views in views.py; see authentication.async_views.
+
+
+def save_profile(user, specialties):
+    # As in ProfileUpdateView: specialties before the save that moves the ETag.
+    with transaction.atomic():
+        set_user_specialties(user, specialties)
+        user.save()
+
+
+class AsyncProfileUpdateView(AsyncAPIView):
+    http_method_names = ['put']
+    authentication_required = True
+    account_types = ['tasksmith']
+
+    async def put(self, request, pk, *args, **kwargs):
+        try:
+            user = await aget_object_or_404(User, id=pk)
+
+            if request.user != user:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'You can only update your own profile.'
+                }, status=status.HTTP_403_FORBIDDEN)
+
+            full_name = self.data.get('full_name', user.full_name)
+            bio = self.data.get('bio', user.bio)
+            location = self.data.get('location', user.location)
+            phone_number = self.data.get('phone_number', user.phone_number)
+            website = self.data.get('website', user.website)
+            company = self.data.get('company', user.company)
+            specialties_data = get_list(self.data, 'specialties')
+            image_file = self.files.get('image', None)
+            defer_image = bool(image_file) and settings.IMAGEKIT_UPLOAD_MODE == 'deferred'
+
+            # The upload blocks on ImageKit, so it waits in the upload pool
+            # rather than on the event loop.
+            if image_file and not defer_image:
+                user.image = await run_in_executor(get_upload_executor(), upload_to_imagekit, image_file)
+            elif self.data.get('image') == '':
+                user.image = None
+
+            user.full_name = full_name
+            user.bio = bio
+            user.location = location
+            user.phone_number = phone_number
+            user.website = website
+            user.company = company
+
+            await sync_to_async(save_profile)(user, specialties_data)
+
+            # Started after user.asave() so the save cannot overwrite the new URL.
+            if defer_image:
+                await sync_to_async(upload_user_image_deferred, thread_sensitive=False)(user.id, image_file)
+
+            return JsonResponse({
+                'success': True,
+                'message': 'User profile updated successfully.',
+                'data': {
+                    'user': {
+                        'id': user.id,
+                        'full_name': user.full_name,
+                        'email': user.email,
+                        'bio': user.bio,
+                        'location': user.location,
+                        'company': user.company,
+                        'phone_number': user.phone_number,
+                        'website': user.website,
+                        'image': user.image,
+                        'specialties': [s.name async for s in user.specialties.all()]
+                    },
+                    'image_upload_pending': defer_image,
+                }
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'message': f"Profile update failed: {str(e)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,144 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from .helpers import apply_task_stats_delta, resolve_names, invalidate_marketplace
+from .models import TasksDetail, Requirements, Tags
+from .search import get_search_backend
+from .serializers import TaskUploadSerializer
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-lines')
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv')
+
+# Separator for multi-valued CSV columns (task_tags, task_requirements).
+CSV_LIST_SEPARATOR = '|'
+
+
+class UnsupportedFormat(Exception):
+    pass
+
+
+def get_upload_format(content_type):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        return 'ndjson'
+    if content_type in CSV_CONTENT_TYPES:
+        return 'csv'
+    raise UnsupportedFormat(
+        'Unsupported content type. Send application/x-ndjson or text/csv.'
+    )
+
+
+def iter_ndjson_rows(stream):
+    """
+    Yield (row_number, data, error) for each non-blank line of `stream`.
+    """
+    for row_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except (UnicodeDecodeError, ValueError):
+            yield row_number, None, {'non_field_errors': ['Invalid JSON.']}
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, {'non_field_errors': ['Each line must be a JSON object.']}
+            continue
+        yield row_number, data, None
+
+
+def iter_csv_rows(stream):
+    """
+    Yield (row_number, data, error) for each CSV record of `stream`.
+
+    Empty cells are dropped so model defaults apply, and the tag and
+    requirement columns are split on CSV_LIST_SEPARATOR.
+    """
+    lines = (line.decode('utf-8-sig') if isinstance(line, bytes) else line for line in stream)
+    try:
+        for row_number, record in enumerate(csv.DictReader(lines), start=1):
+            data = {key: value for key, value in record.items() if key and value not in (None, '')}
+            for field in ('task_tags', 'task_requirements'):
+                if field in data:
+                    names = [name.strip() for name in data[field].split(CSV_LIST_SEPARATOR)]
+                    data[field] = [{'name': name} for name in names if name]
+            yield row_number, data, None
+    except (UnicodeDecodeError, csv.Error) as error:
+        yield None, None, {'non_field_errors': [f'Unreadable CSV: {error}']}
+
+
+def _insert_chunk(user, valid_rows):
+    """
+    Insert one chunk of validated rows with a fixed number of queries.
+    """
+    tasks = []
+    tag_names = []
+    requirement_names = []
+    for data in valid_rows:
+        data = dict(data)
+        tag_names.append([tag['name'] for tag in data.pop('task_tags', [])])
+        requirement_names.append([req['name'] for req in data.pop('task_requirements', [])])
+        tasks.append(TasksDetail(user=user, **data))
+
+    with transaction.atomic():
+        tasks = TasksDetail.objects.bulk_create(tasks)
+
+        tag_ids = resolve_names(Tags, {name for names in tag_names for name in names})
+        requirement_ids = resolve_names(Requirements, {name for names in requirement_names for name in names})
+
+        TagThrough = TasksDetail.task_tags.through
+        RequirementThrough = TasksDetail.task_requirements.through
+        TagThrough.objects.bulk_create([
+            TagThrough(tasksdetail_id=task.id, tags_id=tag_id)
+            for task, names in zip(tasks, tag_names)
+            for tag_id in {tag_ids[name] for name in names}
+        ])
+        RequirementThrough.objects.bulk_create([
+            RequirementThrough(tasksdetail_id=task.id, requirements_id=requirement_id)
+            for task, names in zip(tasks, requirement_names)
+            for requirement_id in {requirement_ids[name] for name in names}
+        ])
+
+        apply_task_stats_delta(user.id, added=[task.task_status for task in tasks])
+        get_search_backend().index_tasks([task.id for task in tasks])
+        invalidate_marketplace(*{task.task_status for task in tasks})
+    return len(tasks)
+
+
+def ingest_tasks(user, rows, chunk_size=500, max_errors=100):
+    """
+    Validate and insert tasks from a (row_number, data, error) iterator.
+
+    Rows are consumed `chunk_size` at a time so memory stays bounded by the
+    chunk, not the upload. Returns (created, failed, errors) where `errors`
+    holds at most `max_errors` per-row entries.
+    """
+    created = failed = 0
+    errors = []
+    rows = iter(rows)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        valid_rows = []
+        for row_number, data, error in chunk:
+            if error is None:
+                serializer = TaskUploadSerializer(data=data)
+                if serializer.is_valid():
+                    valid_rows.append(serializer.validated_data)
+                    continue
+                error = serializer.errors
+
+            failed += 1
+            if len(errors) < max_errors:
+                errors.append({'row': row_number, 'errors': error})
+
+        if valid_rows:
+            created += _insert_chunk(user, valid_rows)
+
+    return created, failed, errors
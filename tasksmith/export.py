@@ -0,0 +1,83 @@
+import csv
+import json
+import zlib
+from itertools import islice
+
+from .bulk_upload import CSV_LIST_SEPARATOR
+from .fast_serializers import compile_serializer
+from .helpers import get_task_read_queryset
+from .serializers import GetTasksSerializer
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+
+class Echo:
+    """
+    File-like object whose write() returns the data, for csv.writer.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_task_chunks(user, chunk_size):
+    """
+    Yield the user's live tasks, oldest first, as lists of at most
+    `chunk_size` rendered dicts.
+
+    Rows are streamed with iterator() and each chunk's tags and requirements
+    are fetched with it, so memory is bounded by the chunk.
+    """
+    compiled = compile_serializer(GetTasksSerializer)
+    rows = compiled.values(get_task_read_queryset(user).order_by('created_at', 'id')).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield compiled.render(chunk)
+
+
+def iter_ndjson(chunks):
+    for chunk in chunks:
+        yield ''.join(json.dumps(task, ensure_ascii=False, separators=(',', ':')) + '\n' for task in chunk).encode()
+
+
+def iter_csv(chunks):
+    """
+    CSV in the layout TaskBulkUploadView accepts, so exports can be re-imported.
+    """
+    writer = csv.writer(Echo())
+    header = None
+    for chunk in chunks:
+        lines = []
+        for task in chunk:
+            if header is None:
+                header = list(task)
+                lines.append(writer.writerow(header))
+            lines.append(writer.writerow([
+                CSV_LIST_SEPARATOR.join(item['name'] for item in task[key]) if isinstance(task[key], list) else task[key]
+                for key in header
+            ]))
+        yield ''.join(lines).encode()
+    if header is None:
+        yield writer.writerow(list(GetTasksSerializer().fields)).encode()
+
+
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_tasks(user, export_format, chunk_size=1000, compress=False):
+    """
+    Return a byte-chunk iterator of the user's tasks in `export_format`.
+    """
+    chunks = iter_task_chunks(user, chunk_size)
+    stream = iter_ndjson(chunks) if export_format == 'ndjson' else iter_csv(chunks)
+    return gzip_stream(stream) if compress else stream
@@ -0,0 +1,155 @@
+"""
+Compiled read-only serialization.
+
+Rendering a list through a ModelSerializer instantiates a model per row and
+walks every field's get_attribute()/to_representation() chain. For the
+read-only response serializers, `compile_serializer()` turns the serializer
+class into a plan once, then `render()` builds the same dicts straight from
+values() rows, fetching each many-to-many relation with one values_list()
+query. The output is identical to `serializer_class(rows, many=True).data`.
+
+Only plain model fields, nested many=True ModelSerializers of plain fields,
+and many=True SlugRelatedFields are supported; anything else raises
+ImproperlyConfigured when the serializer is compiled.
+"""
+import threading
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, SlugRelatedField
+
+# to_representation() is a no-op for the values these return from the database.
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.EmailField)
+
+_plans = {}
+# Reentrant: compiling a serializer compiles its nested serializers.
+_lock = threading.RLock()
+
+
+def convert_row(plan, values):
+    return {
+        key: value if value is None or convert is None else convert(value)
+        for (key, convert), value in zip(plan, values)
+    }
+
+
+class Relation:
+    """
+    A many-to-many field rendered as a list, fetched for a whole page at once.
+
+    Items are dicts built from `child_plan` ((key, converter) per column),
+    or bare values of the single column when `child_plan` is None.
+    """
+    def __init__(self, model, field_name, columns, child_plan=None):
+        model_field = model._meta.get_field(field_name)
+        if not model_field.many_to_many:
+            raise ImproperlyConfigured(f'{model.__name__}.{field_name} is not a many-to-many field.')
+        self.related_model = model_field.related_model
+        self.query_name = model_field.related_query_name()
+        self.columns = columns
+        self.child_plan = child_plan
+
+    def fetch(self, pks):
+        """
+        Return {pk: [item, ...]} for the rows with primary keys `pks`.
+        """
+        items = {}
+        rows = (
+            self.related_model._base_manager
+            .filter(**{f'{self.query_name}__in': pks})
+            # The same order as the prefetches in helpers.with_task_read_fields.
+            .order_by('pk')
+            .values_list(self.query_name, *self.columns)
+        )
+        for pk, *values in rows:
+            item = values[0] if self.child_plan is None else convert_row(self.child_plan, values)
+            items.setdefault(pk, []).append(item)
+        return items
+
+
+class CompiledSerializer:
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer_class.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.columns = [self.pk]
+        # (key, column, converter) per plain field, in output order.
+        self.fields = []
+        self.relations = {}
+
+        for key, field in serializer.fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                child = compile_serializer(type(field.child))
+                if child.relations:
+                    raise ImproperlyConfigured(f'{serializer_class.__name__}.{key}: nested relations are not supported.')
+                self.relations[key] = Relation(
+                    self.model, field.source,
+                    [column for _, column, _ in child.fields],
+                    [(child_key, convert) for child_key, _, convert in child.fields],
+                )
+            elif isinstance(field, ManyRelatedField) and isinstance(field.child_relation, SlugRelatedField):
+                self.relations[key] = Relation(self.model, field.source, [field.child_relation.slug_field])
+            else:
+                column = self.column_for(serializer_class, key, field)
+                self.fields.append((key, column, None if type(field) in PASSTHROUGH_FIELDS else field.to_representation))
+                if column not in self.columns:
+                    self.columns.append(column)
+        self.keys = list(serializer.fields)
+
+    def column_for(self, serializer_class, key, field):
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            model_field = None
+        if model_field is None or not model_field.concrete or model_field.is_relation:
+            raise ImproperlyConfigured(
+                f'{serializer_class.__name__}.{key} is not a plain model field and cannot be compiled.'
+            )
+        return model_field.attname
+
+    def values(self, queryset, *extra):
+        """
+        `queryset` reduced to the columns this serializer reads, plus `extra`.
+        """
+        return queryset.prefetch_related(None).values(*dict.fromkeys(self.columns + list(extra)))
+
+    def render(self, rows):
+        """
+        Render values() rows (dicts keyed by column) as the serializer would.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+        pks = [row[self.pk] for row in rows]
+        related = {key: relation.fetch(pks) for key, relation in self.relations.items()}
+
+        data = []
+        for row in rows:
+            # Pre-seeded so keys come out in the serializer's order.
+            item = dict.fromkeys(self.keys)
+            for key, column, convert in self.fields:
+                value = row[column]
+                item[key] = value if value is None or convert is None else convert(value)
+            for key, items in related.items():
+                item[key] = items.get(row[self.pk], [])
+            data.append(item)
+        return data
+
+    def render_instance(self, instance):
+        """
+        Render an already loaded model instance without the serializer.
+        """
+        return self.render([{column: getattr(instance, column) for column in self.columns}])[0]
+
+
+def compile_serializer(serializer_class):
+    """
+    Return the (cached) CompiledSerializer for a read-only serializer class.
+    """
+    plan = _plans.get(serializer_class)
+    if plan is None:
+        with _lock:
+            plan = _plans.get(serializer_class)
+            if plan is None:
+                plan = _plans[serializer_class] = CompiledSerializer(serializer_class)
+    return plan
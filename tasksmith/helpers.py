@@ -0,0 +1,292 @@
+import hashlib
+import json
+import threading
+from collections import Counter, OrderedDict
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Prefetch
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from authentication.models import User
+from authentication.user_cache import invalidate_cached_user
+from .models import TasksDetail, Requirements, Tags, UserTaskStats, STATUS_COUNTER_FIELDS
+
+# Columns rendered by GetTasksSerializer plus the keys needed for filtering
+# and cursor pagination.
+TASK_READ_FIELDS = [
+    'id',
+    'user_id',
+    'task_title',
+    'task_description',
+    'task_assignment_type',
+    'task_reward_per_completion',
+    'task_category',
+    'task_maximum_completions',
+    'task_status',
+    'created_at',
+]
+
+
+def with_task_read_fields(queryset):
+    """
+    Project `queryset` to the serialized columns and prefetch tags and
+    requirements, so rendering N tasks costs a constant number of queries.
+    Related rows are ordered by id, as in the compiled serializers.
+    """
+    return queryset.only(*TASK_READ_FIELDS).prefetch_related(
+        Prefetch('task_requirements', queryset=Requirements.objects.only('id', 'name').order_by('id')),
+        Prefetch('task_tags', queryset=Tags.objects.only('id', 'name').order_by('id')),
+    )
+
+
+def get_task_read_queryset(user):
+    """
+    Live tasks for `user`, ready for GetTasksSerializer.
+    """
+    return with_task_read_fields(TasksDetail.objects.filter(user=user))
+
+
+def get_marketplace_queryset(category=None, tag=None, min_reward=None, max_reward=None):
+    """
+    Approved live tasks from every tasksmith, optionally filtered. The base
+    predicate matches the partial indexes on TasksDetail.
+    """
+    tasks = TasksDetail.objects.filter(task_status='approved')
+    if category:
+        tasks = tasks.filter(task_category=category)
+    if tag:
+        tasks = tasks.filter(task_tags__name=tag)
+    if min_reward is not None:
+        tasks = tasks.filter(task_reward_per_completion__gte=min_reward)
+    if max_reward is not None:
+        tasks = tasks.filter(task_reward_per_completion__lte=max_reward)
+    return with_task_read_fields(tasks)
+
+
+MARKETPLACE_VERSION_KEY = 'marketplace:version'
+
+
+def get_marketplace_version():
+    return cache.get_or_set(MARKETPLACE_VERSION_KEY, 1, timeout=None)
+
+
+def marketplace_cache_key(version, params):
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f'marketplace:v{version}:{digest}'
+
+
+def invalidate_marketplace(*task_statuses):
+    """
+    Drop every cached marketplace page once the current transaction commits,
+    if any of the written tasks is, or was, approved.
+    """
+    if 'approved' not in task_statuses:
+        return
+
+    def bump():
+        try:
+            cache.incr(MARKETPLACE_VERSION_KEY)
+        except ValueError:
+            cache.set(MARKETPLACE_VERSION_KEY, 2, timeout=None)
+
+    transaction.on_commit(bump)
+
+TASK_STATS_FIELDS = ['total_tasks', *STATUS_COUNTER_FIELDS.values()]
+
+
+def compute_task_stats(user_ids=None):
+    """
+    Count live tasks per user and status straight from tasks_detail.
+
+    Returns {user_id: {counter_field: count, ...}} for every user that has at
+    least one live task, restricted to `user_ids` when given.
+    """
+    tasks = TasksDetail.objects.all()
+    if user_ids is not None:
+        tasks = tasks.filter(user_id__in=user_ids)
+
+    stats = {}
+    rows = tasks.values('user_id', 'task_status').annotate(count=Count('id')).order_by()
+    for row in rows:
+        counters = stats.setdefault(row['user_id'], dict.fromkeys(TASK_STATS_FIELDS, 0))
+        counters['total_tasks'] += row['count']
+        field = STATUS_COUNTER_FIELDS.get(row['task_status'])
+        if field:
+            counters[field] += row['count']
+    return stats
+
+
+def save_task_stats(user_id, counters):
+    """
+    Store recomputed counters for one user, along with the denormalized
+    User.total_tasks/tasks_completed columns.
+
+    The stats version is bumped and tasks_updated_at moved, so ETags built
+    from the old counters stop matching.
+    """
+    defaults = {field: counters.get(field, 0) for field in TASK_STATS_FIELDS}
+    defaults['tasks_updated_at'] = timezone.now()
+    stats, created = UserTaskStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={**defaults, 'version': F('version') + 1},
+        create_defaults=defaults,
+    )
+    if not created:
+        stats.refresh_from_db(fields=['version'])
+    User.objects.filter(pk=user_id).update(
+        total_tasks=stats.total_tasks,
+        tasks_completed=stats.completed_tasks,
+        updated_at=defaults['tasks_updated_at'],
+    )
+    invalidate_cached_user(user_id)
+    return stats
+
+
+def rebuild_task_stats(user_id):
+    """
+    Recompute one user's counters from tasks_detail and store them.
+    """
+    return save_task_stats(user_id, compute_task_stats([user_id]).get(user_id, {}))
+
+
+def get_task_stats(user_id):
+    """
+    Return the user's UserTaskStats row, building it on first access.
+    """
+    stats = UserTaskStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        stats = rebuild_task_stats(user_id)
+    return stats
+
+
+def apply_task_stats_delta(user_id, added=(), removed=()):
+    """
+    Record a write to a user's tasks: bump the stats version and adjust the
+    counters for tasks whose status was added or removed.
+
+    `added` and `removed` are iterables of task statuses; pass neither for an
+    edit that leaves statuses alone. Counters are bumped in place with F()
+    expressions; call this inside the transaction that writes the tasks so
+    both commit together.
+    """
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    total = sum(deltas.values())
+    written_at = timezone.now()
+
+    updates = {'version': F('version') + 1, 'tasks_updated_at': written_at}
+    for task_status, delta in deltas.items():
+        field = STATUS_COUNTER_FIELDS.get(task_status)
+        if field and delta:
+            updates[field] = F(field) + delta
+    if total:
+        updates['total_tasks'] = F('total_tasks') + total
+
+    if not UserTaskStats.objects.filter(user_id=user_id).update(**updates):
+        # No counter row yet: derive it from the table, which already
+        # includes this write.
+        try:
+            with transaction.atomic():
+                rebuild_task_stats(user_id)
+            return
+        except IntegrityError:
+            UserTaskStats.objects.filter(user_id=user_id).update(**updates)
+
+    user_updates = {}
+    if total:
+        user_updates['total_tasks'] = F('total_tasks') + total
+    if deltas.get('completed'):
+        user_updates['tasks_completed'] = F('tasks_completed') + deltas['completed']
+    if user_updates:
+        User.objects.filter(pk=user_id).update(updated_at=written_at, **user_updates)
+        invalidate_cached_user(user_id)
+
+
+class NameIdCache:
+    """
+    Bounded, thread-safe LRU map of (model, name) -> primary key.
+
+    Tags and requirements are never deleted, so a cached id stays valid once
+    its row has committed.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, model, names):
+        found = {}
+        with self._lock:
+            for name in names:
+                key = (model._meta.label, name)
+                pk = self._entries.get(key)
+                if pk is not None:
+                    self._entries.move_to_end(key)
+                    found[name] = pk
+        return found
+
+    def set_many(self, model, ids):
+        with self._lock:
+            for name, pk in ids.items():
+                key = (model._meta.label, name)
+                self._entries[key] = pk
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+name_id_cache = NameIdCache()
+
+
+def resolve_names(model, names):
+    """
+    Map each name to the id of a `model` row (Tags or Requirements).
+
+    Cached names cost nothing; the rest take one IN lookup, plus one
+    conflict-ignoring bulk insert and a re-read only for names that do not
+    exist yet. Ids are cached once the surrounding transaction commits.
+    """
+    names = {name for name in names if name}
+    ids = name_id_cache.get_many(model, names)
+    missing = names - ids.keys()
+    if not missing:
+        return ids
+
+    fetched = dict(model.objects.filter(name__in=missing).values_list('name', 'pk'))
+    new_names = missing - fetched.keys()
+    if new_names:
+        model.objects.bulk_create([model(name=name) for name in new_names], ignore_conflicts=True)
+        fetched.update(model.objects.filter(name__in=new_names).values_list('name', 'pk'))
+
+    transaction.on_commit(lambda: name_id_cache.set_many(model, fetched))
+    ids.update(fetched)
+    return ids
+
+
+def make_etag(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def get_not_modified_response(request, etag, last_modified=None):
+    """
+    Return a 304 response if the request's If-None-Match/If-Modified-Since
+    headers match the given validators, else None.
+    """
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = quote_etag(etag)
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
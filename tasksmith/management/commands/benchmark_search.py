@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasksmith.models import TasksDetail
+from tasksmith.search import InMemorySearchBackend, get_search_backend
+
+WORDS = (
+    'logo design banner poster flyer brand identity website landing page mobile app icon '
+    'illustration vector print social media video edit animation motion copy write blog '
+    'article seo translate urdu english data entry research survey review test qa bug '
+    'python django react api backend frontend database excel sheet report audio podcast '
+    'voice transcription photo retouch product catalog ecommerce shopify wordpress email'
+).split()
+TAGS = 'design writing video marketing development data audio photo translation research'.split()
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark task search. The default "memory" mode indexes a synthetic '
+        'dataset in-process; "db" mode queries the configured backend against '
+        'tasks already in the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['memory', 'db'], default='memory')
+        parser.add_argument('--tasks', type=int, default=1_000_000, help='Synthetic tasks to index (memory mode).')
+        parser.add_argument('--users', type=int, default=100, help='Synthetic task owners (memory mode).')
+        parser.add_argument('--queries', type=int, default=1000)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['mode'] == 'memory':
+            backend, user_ids = self.build_synthetic_index(rng, options['tasks'], options['users'])
+        else:
+            backend = get_search_backend()
+            user_ids = list(
+                TasksDetail.objects
+                .values_list('user_id', flat=True).distinct()[:1000]
+            )
+            if not user_ids:
+                self.stderr.write('No tasks in the database; seed some first.')
+                return
+
+        queries = [
+            (rng.choice(user_ids), ' '.join(rng.sample(WORDS, rng.choice((1, 1, 2, 3)))))
+            for _ in range(options['queries'])
+        ]
+
+        # Warm up per-user loading so it is not counted as query latency.
+        for user_id in set(user_id for user_id, _ in queries):
+            backend.search(user_id, WORDS[0], limit=1)
+
+        latencies = []
+        hits = 0
+        started = time.perf_counter()
+        for user_id, query in queries:
+            query_started = time.perf_counter()
+            hits += len(backend.search(user_id, query, limit=options['limit']))
+            latencies.append((time.perf_counter() - query_started) * 1000)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{type(backend).__name__}: {len(queries)} queries in {elapsed:.2f}s "
+            f"({len(queries) / elapsed:.0f} q/s), avg hits {hits / len(queries):.1f}\n"
+            f"latency ms p50={statistics.median(latencies):.3f} "
+            f"p95={percentile(latencies, 0.95):.3f} p99={percentile(latencies, 0.99):.3f} "
+            f"max={max(latencies):.3f}"
+        )
+
+    def build_synthetic_index(self, rng, task_count, user_count):
+        backend = InMemorySearchBackend(versioned=False)
+        # Skewed word frequencies so some terms are common and others rare.
+        weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+        rng.shuffle(weights)
+
+        owners = set()
+        started = time.perf_counter()
+        for task_id in range(1, task_count + 1):
+            user_id = rng.randrange(user_count)
+            owners.add(user_id)
+            backend.add_document(user_id, task_id, {
+                'task_title': ' '.join(rng.choices(WORDS, weights, k=3)),
+                'task_tags': ' '.join(rng.sample(TAGS, 2)),
+                'task_description': ' '.join(rng.choices(WORDS, weights, k=12)),
+            })
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Indexed {task_count} synthetic tasks for {user_count} users in {elapsed:.1f}s')
+        return backend, sorted(owners)
@@ -0,0 +1,61 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+
+from tasksmith.fast_serializers import compile_serializer
+from tasksmith.helpers import get_task_read_queryset
+from tasksmith.models import TasksDetail
+from tasksmith.serializers import GetTasksSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare GetTasksSerializer(many=True) with its compiled fast path on '
+        'tasks already in the database (e.g. from seed_benchmark_data), and '
+        'check that both render byte-identical JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Tasks rendered per request.')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        owner = (
+            TasksDetail.objects.values('user_id').annotate(tasks=Count('id'))
+            .order_by('-tasks').values_list('user_id', flat=True).first()
+        )
+        if owner is None:
+            raise CommandError('No tasks in the database; seed some first.')
+
+        queryset = get_task_read_queryset(owner).order_by('-created_at', '-id')[:options['page_size']]
+        compiled = compile_serializer(GetTasksSerializer)
+        renderer = JSONRenderer()
+
+        # Fresh querysets each time: both paths pay for their queries.
+        def model_serializer():
+            return renderer.render(GetTasksSerializer(queryset.all(), many=True).data)
+
+        def compiled_serializer():
+            return renderer.render(compiled.render(compiled.values(queryset.all())))
+
+        if model_serializer() != compiled_serializer():
+            raise CommandError('The compiled serializer rendered different JSON.')
+
+        results = {}
+        for name, render in (('ModelSerializer', model_serializer), ('compiled', compiled_serializer)):
+            latencies = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                render()
+                latencies.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(latencies)
+            self.stdout.write(
+                f'{name}: {options["page_size"]} tasks, p50={results[name]:.2f}ms '
+                f'min={min(latencies):.2f}ms max={max(latencies):.2f}ms'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Identical JSON; compiled is {results["ModelSerializer"] / results["compiled"]:.1f}x faster.'
+        ))
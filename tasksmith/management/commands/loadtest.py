@@ -0,0 +1,247 @@
+import io
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication import imagekit
+from authentication.fake_imagekit import FakeImageKitServer
+from authentication.models import User
+from tasksmith.helpers import apply_task_stats_delta
+from tasksmith.models import Tags, TasksDetail
+
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow, profile edits are sent without an image.
+    Image = None
+
+LOADTEST_PASSWORD = 'loadtest-password'
+DEFAULT_MIX = 'login=1,task_upload=2,get_tasks=5,dashboard=3,profile_edit=1'
+CATEGORIES = ['design', 'writing', 'development', 'marketing', 'data']
+TAG_NAMES = ['logo', 'blog', 'django', 'seo', 'excel', 'video', 'react', 'survey']
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples, elapsed):
+    """
+    Stats for a list of (latency_ms, status_code) samples.
+    """
+    latencies = [latency for latency, _ in samples]
+    statuses = Counter(str(status_code) for _, status_code in samples)
+    return {
+        'requests': len(latencies),
+        'errors': sum(count for status_code, count in statuses.items() if int(status_code) >= 400),
+        'status_codes': dict(sorted(statuses.items())),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(max(latencies), 2),
+    }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in Command.operations:
+            raise CommandError(f'Unknown operation "{name.strip()}". Choose from: {", ".join(Command.operations)}.')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a weighted mix of API calls through the real URLconf and '
+        'middleware, from concurrent threads, against the configured database. '
+        'SMTP and ImageKit are replaced by local stubs.'
+    )
+    operations = ('login', 'task_upload', 'get_tasks', 'dashboard', 'profile_edit')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted operations (default: {DEFAULT_MIX}).')
+        parser.add_argument('--users', type=int, default=20, help='Load-test accounts to create or reuse.')
+        parser.add_argument('--tasks-per-user', type=int, default=50, help='Tasks each account starts with.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--label', help='Name for this run in the JSON results; defaults to the git commit.')
+        parser.add_argument('--keep-rate-limits', action='store_true',
+                            help='Leave RATE_LIMITS on; by default they are lifted so logins are measured, not throttled.')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        rng = random.Random(options['seed'])
+
+        # Allows the test client's "testserver" host and routes mail to memory.
+        try:
+            setup_test_environment()
+        except RuntimeError:
+            pass  # Already set up, e.g. when called from the test suite.
+        server = FakeImageKitServer(latency=0.02)
+        server.start_in_thread()
+        stubs = {
+            'IMAGEKIT_UPLOAD_URL': server.upload_url,
+            'IMAGEKIT_UPLOAD_MODE': 'sync',
+            'EMAIL_OUTBOX_ENABLED': False,
+        }
+        if not options['keep_rate_limits']:
+            stubs['RATE_LIMITS'] = {}
+        os.environ.setdefault('IMAGEKIT_PRIVATE_KEY', 'loadtest-key')
+        imagekit._client = None
+
+        try:
+            with override_settings(**stubs):
+                users = self.prepare_users(options['users'], options['tasks_per_user'], rng)
+                plan = rng.choices(list(mix), weights=list(mix.values()), k=options['requests'])
+                results, elapsed = self.run(plan, users, options['concurrency'], options['seed'])
+        finally:
+            imagekit._client = None
+            server.shutdown()
+            server.server_close()
+
+        report = {
+            'label': options['label'] or self.git_commit(),
+            'finished_at': now().isoformat(),
+            'options': {key: options[key] for key in ('requests', 'concurrency', 'mix', 'users', 'tasks_per_user', 'seed')},
+            'overall': summarize([sample for samples in results.values() for sample in samples], elapsed),
+            'operations': {name: summarize(samples, elapsed) for name, samples in sorted(results.items())},
+        }
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def prepare_users(self, count, tasks_per_user, rng):
+        """
+        Create (or reuse) verified tasksmith accounts, each with
+        `tasks_per_user` tasks, and return them with access tokens.
+        """
+        password = make_password(LOADTEST_PASSWORD)
+        users = []
+        for i in range(count):
+            user, created = User.objects.get_or_create(
+                email=f'loadtest-{i}@example.com',
+                defaults={
+                    'username': f'loadtest-{i}',
+                    'password': password,
+                    'phone_number': f'9{i:010d}',
+                    'account_type': 'tasksmith',
+                    'is_verified': True,
+                },
+            )
+            missing = tasks_per_user - TasksDetail.objects.filter(user=user).count()
+            if missing > 0:
+                tasks = TasksDetail.objects.bulk_create([self.build_task(user, rng) for _ in range(missing)])
+                apply_task_stats_delta(user.id, added=[task.task_status for task in tasks])
+            users.append((user, str(AccessToken.for_user(user))))
+
+        Tags.objects.bulk_create([Tags(name=name) for name in TAG_NAMES], ignore_conflicts=True)
+        return users
+
+    def build_task(self, user, rng):
+        return TasksDetail(
+            user=user,
+            task_assignment_type='single',
+            task_title=f'{rng.choice(TAG_NAMES).title()} task',
+            task_reward_per_completion=rng.randint(1, 500),
+            task_category=rng.choice(CATEGORIES),
+            task_status=rng.choice(['pending', 'approved', 'in_progress', 'completed']),
+        )
+
+    def run(self, plan, users, concurrency, seed):
+        local = threading.local()
+        avatar = self.build_avatar()
+        results = {name: [] for name in set(plan)}
+        results_lock = threading.Lock()
+
+        def call(args):
+            index, operation = args
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.rng = random.Random(f'{seed}-{threading.get_ident()}')
+            user, token = users[index % len(users)]
+            started = time.perf_counter()
+            response = getattr(self, f'op_{operation}')(local.client, local.rng, user, token, avatar)
+            latency = (time.perf_counter() - started) * 1000
+            with results_lock:
+                results[operation].append((latency, response.status_code))
+
+        started = time.perf_counter()
+        if concurrency == 1:
+            for args in enumerate(plan):
+                call(args)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadtest') as pool:
+                list(pool.map(call, enumerate(plan)))
+        return results, time.perf_counter() - started
+
+    def build_avatar(self):
+        if Image is None:
+            return None
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), (90, 120, 200)).save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    def op_login(self, client, rng, user, token, avatar):
+        return client.post(reverse('login'), {'email': user.email, 'password': LOADTEST_PASSWORD},
+                           content_type='application/json')
+
+    def op_task_upload(self, client, rng, user, token, avatar):
+        return client.post(reverse('task_upload'), {
+            'task_assignment_type': 'single',
+            'task_title': f'{rng.choice(TAG_NAMES).title()} task',
+            'task_reward_per_completion': rng.randint(1, 500),
+            'task_category': rng.choice(CATEGORIES),
+            'task_tags': [{'name': name} for name in rng.sample(TAG_NAMES, 2)],
+        }, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def op_get_tasks(self, client, rng, user, token, avatar):
+        return client.get(reverse('get_user_tasks'), HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def op_dashboard(self, client, rng, user, token, avatar):
+        return client.get(reverse('dashboard'), HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def op_profile_edit(self, client, rng, user, token, avatar):
+        data = {'bio': f'Load test {rng.random():.6f}', 'specialties': rng.sample(CATEGORIES, 2)}
+        if avatar:
+            data['image'] = io.BytesIO(avatar)
+            data['image'].name = 'avatar.jpg'
+        return client.put(reverse('edit-profile', args=[user.id]), encode_multipart(BOUNDARY, data),
+                          content_type=MULTIPART_CONTENT, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def print_report(self, report):
+        rows = [('overall', report['overall'])] + list(report['operations'].items())
+        self.stdout.write(f"{'operation':<14}{'requests':>9}{'errors':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for name, stats in rows:
+            self.stdout.write(
+                f"{name:<14}{stats['requests']:>9}{stats['errors']:>8}{stats['rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+            )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from authentication.models import User
+from tasksmith.helpers import compute_task_stats, save_task_stats, TASK_STATS_FIELDS
+from tasksmith.models import UserTaskStats
+
+
+class Command(BaseCommand):
+    help = 'Reconcile user_task_stats counters (and User.total_tasks/tasks_completed) against tasks_detail.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Only reconcile this user id (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users reconciled per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing.')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if user_ids is None:
+            user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+
+        checked = drifted = 0
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            expected = compute_task_stats(batch)
+            current = {stats.user_id: stats for stats in UserTaskStats.objects.filter(user_id__in=batch)}
+
+            with transaction.atomic():
+                for user_id in batch:
+                    checked += 1
+                    counters = expected.get(user_id, dict.fromkeys(TASK_STATS_FIELDS, 0))
+                    stats = current.get(user_id)
+                    if stats is not None and all(getattr(stats, field) == counters[field] for field in TASK_STATS_FIELDS):
+                        continue
+
+                    drifted += 1
+                    if dry_run:
+                        continue
+                    save_task_stats(user_id, counters)
+
+        verb = 'would be rebuilt' if dry_run else 'rebuilt'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} users; {drifted} {verb}.'))
@@ -0,0 +1,261 @@
+import io
+import random
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from authentication.models import Specialty, User
+from authentication.user_cache import invalidate_all_cached_users
+from tasksmith.helpers import TASK_STATS_FIELDS, compute_task_stats, invalidate_marketplace
+from tasksmith.models import Tags, TasksDetail, UserTaskStats
+from tasksmith.search import get_search_backend
+
+from .benchmark_search import WORDS
+
+EMAIL_TEMPLATE = 'bench-{}@example.com'
+# Rows are generated in blocks with one RNG per block, so a top-up run
+# produces exactly the rows a single run would have.
+BLOCK_SIZE = 10_000
+
+SPECIALTIES = (
+    'graphic design', 'content writing', 'web development', 'data entry', 'seo', 'translation',
+    'video editing', 'social media', 'mobile apps', 'illustration', 'copywriting', 'qa testing',
+    'voice over', 'photo editing', 'bookkeeping', 'research', 'email marketing', 'ui design',
+    'wordpress', 'shopify', 'excel', 'python', 'react', 'transcription', 'animation',
+)
+TASK_STATUS_WEIGHTS = {
+    'pending': 30, 'approved': 35, 'in_progress': 10, 'review': 5,
+    'submitted': 8, 'completed': 10, 'rejected': 2,
+}
+TASK_CATEGORIES = ('design', 'writing', 'development', 'marketing', 'data', 'video', 'audio', 'other')
+
+
+def zipf_weights(count, exponent=1.1):
+    """
+    Cumulative weights giving the item of rank k a share proportional to
+    1 / k**exponent.
+    """
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def pick_distinct(rng, population, cum_weights, count):
+    return list(dict.fromkeys(rng.choices(population, cum_weights=cum_weights, k=count)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic benchmark users (bench-N@example.com) and tasks with '
+        'skewed owner, tag and specialty distributions. Deterministic for a '
+        'given --seed; re-running with larger counts only adds the missing rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000, help='Total benchmark users wanted.')
+        parser.add_argument('--tasks', type=int, default=10_000_000, help='Total benchmark tasks wanted.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--password', default='benchmark-password', help='Password of every benchmark user.')
+        parser.add_argument('--owner-skew', type=float, default=3.0,
+                            help='Higher values concentrate tasks on fewer users; 1 is uniform.')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL.')
+
+    def handle(self, *args, **options):
+        self.seed = options['seed']
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        Tags.objects.bulk_create([Tags(name=name) for name in WORDS], ignore_conflicts=True)
+        Specialty.objects.bulk_create([Specialty(name=name) for name in SPECIALTIES], ignore_conflicts=True)
+        tag_ids = dict(Tags.objects.filter(name__in=WORDS).values_list('name', 'id'))
+        specialty_ids = dict(Specialty.objects.filter(name__in=SPECIALTIES).values_list('name', 'id'))
+        self.tag_ids = [tag_ids[name] for name in WORDS]
+        self.specialty_ids = [specialty_ids[name] for name in SPECIALTIES]
+
+        bench_users = User.all_objects.filter(email__startswith=EMAIL_TEMPLATE.split('{')[0])
+        existing = bench_users.count()
+        if existing < options['users']:
+            # Hashed once: PBKDF2 per user would dominate the run.
+            password = make_password(options['password'])
+            self.seed_users(existing, options['users'], password)
+
+        user_ids = self.user_ids_by_index(bench_users)
+        existing = TasksDetail.all_objects.filter(user__in=bench_users).count()
+        if existing < options['tasks'] and user_ids:
+            touched = self.seed_tasks(existing, options['tasks'], user_ids, options['owner_skew'])
+            self.refresh_task_stats(sorted(touched))
+
+    def user_ids_by_index(self, bench_users):
+        prefix, suffix = EMAIL_TEMPLATE.split('{}')
+        ids = {}
+        for user_id, email in bench_users.values_list('id', 'email').iterator(chunk_size=10_000):
+            index = email[len(prefix):-len(suffix)]
+            if index.isdigit():
+                ids[int(index)] = user_id
+        return [ids[index] for index in sorted(ids)]
+
+    def seed_users(self, start, stop, password):
+        SpecialtyLink = User.specialties.through
+        specialty_weights = zipf_weights(len(self.specialty_ids))
+        started = time.perf_counter()
+        for block in range(start // BLOCK_SIZE, (stop - 1) // BLOCK_SIZE + 1):
+            rng = random.Random(f'{self.seed}:users:{block}')
+            users, specialties = [], []
+            for index in range(block * BLOCK_SIZE, min((block + 1) * BLOCK_SIZE, stop)):
+                first, last = rng.choice(WORDS).title(), rng.choice(WORDS).title()
+                user = User(
+                    username=f'bench{index}', first_name=first, last_name=last, full_name=f'{first} {last}',
+                    email=EMAIL_TEMPLATE.format(index), password=password,
+                    phone_number=f'8{index:010d}', account_type=rng.choices(('tasksmith', 'user'), (4, 1))[0],
+                    is_verified=True, bio=' '.join(rng.sample(WORDS, 8)),
+                )
+                chosen = pick_distinct(rng, self.specialty_ids, specialty_weights, rng.randint(0, 3))
+                # Generated rows before `start` were inserted by an earlier run.
+                if index >= start:
+                    users.append(user)
+                    specialties.append(chosen)
+            if not users:
+                continue
+
+            with transaction.atomic():
+                self.insert(User, users)
+                self.insert(SpecialtyLink, [
+                    SpecialtyLink(user_id=user.pk, specialty_id=specialty_id)
+                    for user, chosen in zip(users, specialties) for specialty_id in chosen
+                ], with_pk=False)
+            self.report('users', min((block + 1) * BLOCK_SIZE, stop), stop, started)
+        invalidate_all_cached_users()
+
+    def seed_tasks(self, start, stop, user_ids, owner_skew):
+        TagLink = TasksDetail.task_tags.through
+        tag_weights = zipf_weights(len(self.tag_ids))
+        statuses = list(TASK_STATUS_WEIGHTS)
+        status_weights = list(accumulate(TASK_STATUS_WEIGHTS.values()))
+        search_backend = get_search_backend()
+        touched = set()
+        started = time.perf_counter()
+        for block in range(start // BLOCK_SIZE, (stop - 1) // BLOCK_SIZE + 1):
+            rng = random.Random(f'{self.seed}:tasks:{block}')
+            tasks, tags = [], []
+            for index in range(block * BLOCK_SIZE, min((block + 1) * BLOCK_SIZE, stop)):
+                words = rng.sample(WORDS, 3)
+                task = TasksDetail(
+                    # A power law over user ranks: a few users own most tasks.
+                    user_id=user_ids[int(len(user_ids) * rng.random() ** owner_skew)],
+                    task_assignment_type=rng.choice(('single', 'multiple')),
+                    task_title=' '.join(words).capitalize()[:50],
+                    task_reward_per_completion=int(rng.paretovariate(1.5) * 5),
+                    task_category=rng.choice(TASK_CATEGORIES),
+                    task_description=' '.join(words + rng.sample(WORDS, 12)),
+                    task_maximum_completions=rng.choice((1, 1, 1, 5, 10, 50)),
+                    task_status=rng.choices(statuses, cum_weights=status_weights)[0],
+                )
+                chosen = pick_distinct(rng, self.tag_ids, tag_weights, rng.randint(0, 4))
+                if index >= start:
+                    tasks.append(task)
+                    tags.append(chosen)
+            if not tasks:
+                continue
+
+            with transaction.atomic():
+                self.insert(TasksDetail, tasks)
+                self.insert(TagLink, [
+                    TagLink(tasksdetail_id=task.pk, tags_id=tag_id)
+                    for task, chosen in zip(tasks, tags) for tag_id in chosen
+                ], with_pk=False)
+                # Fills search_vector on PostgreSQL; no trigger maintains it.
+                search_backend.index_tasks([task.pk for task in tasks])
+            touched.update(task.user_id for task in tasks)
+            self.report('tasks', min((block + 1) * BLOCK_SIZE, stop), stop, started)
+        return touched
+
+    def refresh_task_stats(self, user_ids, batch_size=1000):
+        """
+        Recompute the dashboard counters of the users that got tasks, in
+        bulk rather than one rebuild_task_stats() call per user.
+        """
+        written_at = timezone.now()
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            counters = compute_task_stats(batch)
+            with transaction.atomic():
+                UserTaskStats.objects.bulk_create(
+                    [
+                        UserTaskStats(user_id=user_id, tasks_updated_at=written_at, **counters.get(user_id, {}))
+                        for user_id in batch
+                    ],
+                    update_conflicts=True, unique_fields=['user'],
+                    update_fields=[*TASK_STATS_FIELDS, 'tasks_updated_at'],
+                )
+                UserTaskStats.objects.filter(user_id__in=batch).update(version=F('version') + 1)
+                User.all_objects.bulk_update([
+                    User(
+                        pk=user_id, updated_at=written_at,
+                        total_tasks=counters.get(user_id, {}).get('total_tasks', 0),
+                        tasks_completed=counters.get(user_id, {}).get('completed_tasks', 0),
+                    )
+                    for user_id in batch
+                ], ['total_tasks', 'tasks_completed', 'updated_at'])
+        invalidate_all_cached_users()
+        invalidate_marketplace('approved')
+
+    def insert(self, model, objs, with_pk=True):
+        if not objs:
+            return
+        if not self.use_copy:
+            # Returns primary keys on PostgreSQL, SQLite and MariaDB.
+            model._base_manager.bulk_create(objs)
+            return
+
+        opts = model._meta
+        fields = [field for field in opts.concrete_fields if with_pk or not field.primary_key]
+        with connection.cursor() as cursor:
+            if with_pk:
+                cursor.execute(
+                    'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                    [opts.db_table, opts.pk.column, len(objs)],
+                )
+                for obj, (pk,) in zip(objs, cursor.fetchall()):
+                    obj.pk = pk
+            buffer = io.StringIO()
+            for obj in objs:
+                buffer.write('\t'.join(
+                    copy_value(field.get_db_prep_save(field.pre_save(obj, True), connection)) for field in fields
+                ))
+                buffer.write('\n')
+            copy_from(cursor, opts.db_table, [field.column for field in fields], buffer.getvalue())
+
+    def report(self, what, done, total, started):
+        self.stdout.write(f'{what}: {done}/{total} after {time.perf_counter() - started:.1f}s')
+
+
+def copy_value(value):
+    """
+    Format a value for COPY ... FROM STDIN in the default text format.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copy_from(cursor, table, columns, data):
+    qn = connection.ops.quote_name
+    sql = f'COPY {qn(table)} ({", ".join(qn(column) for column in columns)}) FROM STDIN'
+    raw = cursor.cursor
+    if hasattr(raw, 'copy'):  # psycopg 3
+        with raw.copy(sql) as copy:
+            copy.write(data)
+    else:  # psycopg2
+        raw.copy_expert(sql, io.StringIO(data))
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasksmith', '0006_alter_tasksdetail_task_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasksdetail',
+            index=models.Index(fields=['user', 'deleted_at', 'created_at', 'id'], name='tasks_user_live_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0012_specialty_user_specialties'),
+        ('tasksmith', '0007_tasksdetail_user_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_tasks', models.IntegerField(default=0)),
+                ('pending_tasks', models.IntegerField(default=0)),
+                ('approved_tasks', models.IntegerField(default=0)),
+                ('review_tasks', models.IntegerField(default=0)),
+                ('completed_tasks', models.IntegerField(default=0)),
+                ('in_progress_tasks', models.IntegerField(default=0)),
+                ('submitted_tasks', models.IntegerField(default=0)),
+                ('rejected_tasks', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'user_task_stats',
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def dedupe_names(apps, schema_editor):
+    """
+    Collapse Tags/Requirements rows sharing a name onto the lowest id,
+    repointing task links first, so the unique index in 0010 can be built.
+    """
+    TasksDetail = apps.get_model('tasksmith', 'TasksDetail')
+
+    for model_name, field_name in (('Tags', 'task_tags'), ('Requirements', 'task_requirements')):
+        Model = apps.get_model('tasksmith', model_name)
+        field = TasksDetail._meta.get_field(field_name)
+        Through = field.remote_field.through
+        target_column = field.m2m_reverse_field_name()
+
+        duplicates = (
+            Model.objects.values('name')
+            .annotate(total=Count('id'), keep_id=Min('id'))
+            .filter(total__gt=1)
+            .order_by()
+        )
+        for duplicate in duplicates.iterator():
+            keep_id = duplicate['keep_id']
+            group_ids = list(Model.objects.filter(name=duplicate['name']).values_list('id', flat=True))
+            drop_ids = [pk for pk in group_ids if pk != keep_id]
+
+            links = defaultdict(list)
+            rows = Through.objects.filter(**{f'{target_column}__in': group_ids}).values_list('id', 'tasksdetail_id', target_column)
+            for link_id, task_id, target_id in rows:
+                links[task_id].append((target_id != keep_id, link_id))
+
+            stale_links = []
+            repoint_links = []
+            for task_links in links.values():
+                task_links.sort()
+                is_duplicate, first_link = task_links[0]
+                if is_duplicate:
+                    repoint_links.append(first_link)
+                stale_links.extend(link_id for _, link_id in task_links[1:])
+
+            Through.objects.filter(id__in=stale_links).delete()
+            Through.objects.filter(id__in=repoint_links).update(**{target_column: keep_id})
+            Model.objects.filter(id__in=drop_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasksmith', '0008_usertaskstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_names, migrations.RunPython.noop),
+    ]
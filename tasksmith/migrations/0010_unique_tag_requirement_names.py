@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasksmith', '0009_dedupe_tag_requirement_names'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='requirements',
+            name='name',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='tags',
+            name='name',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
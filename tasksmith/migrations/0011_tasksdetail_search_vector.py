@@ -0,0 +1,44 @@
+from django.db import migrations
+
+INDEX_EXISTING_SQL = """
+    UPDATE tasks_detail AS t SET search_vector =
+        setweight(to_tsvector('english', coalesce(t.task_title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(g.name, ' ')
+            FROM tasks_detail_task_tags AS tt
+            JOIN task_tags AS g ON g.id = tt.tags_id
+            WHERE tt.tasksdetail_id = t.id
+        ), '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(t.task_description, '')), 'C')
+    WHERE t.deleted_at IS NULL
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    """
+    Add the tsvector column and GIN index used by PostgresSearchBackend and
+    index existing tasks. Other databases use the in-memory backend instead.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE tasks_detail ADD COLUMN search_vector tsvector')
+    schema_editor.execute('CREATE INDEX tasks_search_vector_gin ON tasks_detail USING GIN (search_vector)')
+    schema_editor.execute(INDEX_EXISTING_SQL)
+
+
+def remove_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS tasks_search_vector_gin')
+    schema_editor.execute('ALTER TABLE tasks_detail DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasksmith', '0010_unique_tag_requirement_names'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, remove_search_vector),
+    ]
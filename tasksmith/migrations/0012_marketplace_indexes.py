@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasksmith', '0011_tasksdetail_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasksdetail',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('task_status', 'approved')), fields=['created_at', 'id'], name='tasks_market_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasksdetail',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('task_status', 'approved')), fields=['task_category', 'created_at', 'id'], name='tasks_market_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasksdetail',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('task_status', 'approved')), fields=['task_reward_per_completion'], name='tasks_market_reward_idx'),
+        ),
+    ]
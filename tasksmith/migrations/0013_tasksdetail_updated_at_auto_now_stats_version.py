@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasksmith', '0012_marketplace_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertaskstats',
+            name='tasks_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='usertaskstats',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='tasksdetail',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
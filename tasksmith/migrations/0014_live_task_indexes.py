@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:40
+
+import django.db.models.manager
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasksmith', '0013_tasksdetail_updated_at_auto_now_stats_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tasksdetail',
+            options={'default_manager_name': 'all_objects'},
+        ),
+        migrations.AlterModelManagers(
+            name='tasksdetail',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tasksdetail',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['user', 'created_at', 'id'], name='tasks_live_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasksdetail',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['user', 'task_status'], name='tasks_live_user_status_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='tasksdetail',
+            name='tasks_user_live_created_idx',
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
-from authentication.models import User
+from django.utils.timezone import now
+from authentication.models import SoftDeleteManager, SoftDeleteQuerySet, User
 
 # Create your models here.
 
@@ -15,7 +16,7 @@ TASK_STATUSES = [
 ]
 
 class Tags(models.Model):
-    name = models.CharField(max_length=50)
+    name = models.CharField(max_length=50, unique=True)
 
     class Meta:
         db_table = 'task_tags'
@@ -25,7 +26,7 @@ class Tags(models.Model):
 
 
 class Requirements(models.Model):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)
 
     class Meta:
         db_table = 'task_requirements'
@@ -51,9 +52,70 @@ class TasksDetail(models.Model):
     task_status = models.CharField(max_length=100, null=False, blank=False, choices=TASK_STATUSES, default='pending')
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
     deleted_by = models.CharField(max_length=255, blank=True, null=True)
 
+    # `objects` skips soft-deleted tasks; `all_objects` includes them and is
+    # the default manager, so related managers and the admin see every row.
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
     class Meta:
         db_table = 'tasks_detail'
+        default_manager_name = 'all_objects'
+        indexes = [
+            # Live tasks only; TasksDetail.objects always adds deleted_at IS NULL.
+            models.Index(
+                fields=['user', 'created_at', 'id'], name='tasks_live_user_created_idx',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['user', 'task_status'], name='tasks_live_user_status_idx',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            # Marketplace feed: approved, live tasks by recency, category or reward.
+            models.Index(
+                fields=['created_at', 'id'], name='tasks_market_created_idx',
+                condition=models.Q(task_status='approved', deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['task_category', 'created_at', 'id'], name='tasks_market_category_idx',
+                condition=models.Q(task_status='approved', deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=['task_reward_per_completion'], name='tasks_market_reward_idx',
+                condition=models.Q(task_status='approved', deleted_at__isnull=True),
+            ),
+        ]
+
+    def soft_delete(self, deleted_by):
+        self.deleted_at = now()
+        self.deleted_by = deleted_by
+        self.save()
+
+
+# Maps each task status to its counter column on UserTaskStats.
+STATUS_COUNTER_FIELDS = {status: f'{status}_tasks' for status, _ in TASK_STATUSES}
+
+
+class UserTaskStats(models.Model):
+    """
+    Per-user live task counts by status, kept in step with task writes so
+    the dashboard is a single primary-key read.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='task_stats')
+    total_tasks = models.IntegerField(default=0)
+    pending_tasks = models.IntegerField(default=0)
+    approved_tasks = models.IntegerField(default=0)
+    review_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
+    in_progress_tasks = models.IntegerField(default=0)
+    submitted_tasks = models.IntegerField(default=0)
+    rejected_tasks = models.IntegerField(default=0)
+    # Bumped on every write to the user's tasks; drives conditional GETs.
+    version = models.BigIntegerField(default=0)
+    tasks_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'user_task_stats'
@@ -0,0 +1,116 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class TaskCursorPaginator:
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    Cursors are opaque base64 tokens holding the boundary row's position and
+    the paging direction, so every page is a single indexed range scan no
+    matter how deep the client goes.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+
+    def __init__(self, request):
+        self.request = request
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def get_page_size(self):
+        raw = self.request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            return self.page_size
+        if size < 1:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    @staticmethod
+    def encode_cursor(task, direction):
+        # Pages are model instances, or values() dicts for compiled serializers.
+        if isinstance(task, dict):
+            created_at, task_id = task['created_at'], task['id']
+        else:
+            created_at, task_id = task.created_at, task.id
+        payload = json.dumps({
+            'c': created_at.isoformat(),
+            'i': task_id,
+            'd': direction,
+        }, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            created_at = parse_datetime(payload['c'])
+            task_id = int(payload['i'])
+            direction = payload['d']
+        except (binascii.Error, ValueError, KeyError, TypeError, UnicodeDecodeError):
+            raise InvalidCursor('Invalid cursor.')
+        if created_at is None or direction not in ('n', 'p'):
+            raise InvalidCursor('Invalid cursor.')
+        return created_at, task_id, direction
+
+    def paginate_queryset(self, queryset):
+        """
+        Return one page of `queryset` and populate next/previous cursors.
+
+        Raises InvalidCursor if the cursor query param cannot be decoded.
+        """
+        page_size = self.get_page_size()
+        token = self.request.query_params.get(self.cursor_query_param)
+
+        if token:
+            created_at, task_id, direction = self.decode_cursor(token)
+        else:
+            created_at, task_id, direction = None, None, 'n'
+
+        if direction == 'n':
+            queryset = queryset.order_by('-created_at', '-id')
+            if created_at is not None:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=task_id)
+                )
+        else:
+            queryset = queryset.order_by('created_at', 'id').filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=task_id)
+            )
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if direction == 'p':
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, token is not None
+
+        if rows and has_next:
+            self.next_cursor = self.encode_cursor(rows[-1], 'n')
+        if rows and has_previous:
+            self.previous_cursor = self.encode_cursor(rows[0], 'p')
+        return rows
+
+    def get_pagination_data(self):
+        return {
+            'next_cursor': self.next_cursor,
+            'previous_cursor': self.previous_cursor,
+        }
@@ -0,0 +1,307 @@
+import math
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import TasksDetail, UserTaskStats
+
+# Relative weight of each indexed field, mirroring the A/B/C weights of the
+# Postgres tsvector.
+FIELD_WEIGHTS = {
+    'task_title': 4,
+    'task_tags': 2,
+    'task_description': 1,
+}
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'with',
+})
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+class BaseSearchBackend:
+    def index_tasks(self, task_ids):
+        """Refresh the index entries of `task_ids` after they were written."""
+        raise NotImplementedError
+
+    def remove_tasks(self, user_id, task_ids):
+        """Drop `task_ids` from the index after they were soft-deleted."""
+        raise NotImplementedError
+
+    def remove_users(self, user_ids):
+        """Drop every task of `user_ids` after the users were deleted."""
+        raise NotImplementedError
+
+    def search(self, user_id, query, limit, offset=0):
+        """Return ids of the user's live tasks matching `query`, best first."""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Ranked search over the `tasks_detail.search_vector` tsvector column and
+    its GIN index (see migration 0011).
+    """
+    config = 'english'
+
+    UPDATE_SQL = """
+        UPDATE tasks_detail AS t SET search_vector =
+            setweight(to_tsvector(%(config)s::regconfig, coalesce(t.task_title, '')), 'A') ||
+            setweight(to_tsvector(%(config)s::regconfig, coalesce((
+                SELECT string_agg(g.name, ' ')
+                FROM tasks_detail_task_tags AS tt
+                JOIN task_tags AS g ON g.id = tt.tags_id
+                WHERE tt.tasksdetail_id = t.id
+            ), '')), 'B') ||
+            setweight(to_tsvector(%(config)s::regconfig, coalesce(t.task_description, '')), 'C')
+        WHERE t.id = ANY(%(ids)s)
+    """
+
+    def index_tasks(self, task_ids):
+        task_ids = list(task_ids)
+        if not task_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(self.UPDATE_SQL, {'config': self.config, 'ids': task_ids})
+
+    def remove_tasks(self, user_id, task_ids):
+        # Soft-deleted rows are excluded by TasksDetail.objects in search().
+        pass
+
+    def remove_users(self, user_ids):
+        # Deleted rows take their search_vector with them.
+        pass
+
+    def search(self, user_id, query, limit, offset=0):
+        tsquery = "websearch_to_tsquery(%s::regconfig, %s)"
+        params = [self.config, query]
+        return list(
+            TasksDetail.objects
+            .filter(user_id=user_id)
+            .annotate(
+                matched=RawSQL(f"search_vector @@ {tsquery}", params, output_field=BooleanField()),
+                rank=RawSQL(f"ts_rank(search_vector, {tsquery})", params, output_field=FloatField()),
+            )
+            .filter(matched=True)
+            .order_by('-rank', '-id')
+            .values_list('id', flat=True)[offset:offset + limit]
+        )
+
+
+class InMemorySearchBackend(BaseSearchBackend):
+    """
+    Per-process inverted index for SQLite and test deployments.
+
+    Each user's postings are loaded from the database on their first search
+    and kept current by index_tasks/remove_tasks once writes commit. Every
+    write to a user's tasks also bumps UserTaskStats.version; the hooks
+    account for their own write's bump, so a search that finds the stored
+    version moved further (e.g. by another worker, or a seed command in
+    another process) reloads that user. At most `max_users` users are kept,
+    least recently searched first out. `versioned=False` skips the version
+    check, for indexes filled through add_document() alone.
+
+    Scores are field-weighted term frequency times inverse document
+    frequency within the user's own tasks.
+    """
+
+    def __init__(self, max_users=None, versioned=True):
+        self.max_users = max_users or getattr(settings, 'TASK_SEARCH_MEMORY_MAX_USERS', 1000)
+        self.versioned = versioned
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # user_id -> token -> {task_id: weighted term frequency}
+        self._postings = {}
+        # user_id -> task_id -> tokens, used to unindex a task
+        self._documents = {}
+        # user_id -> stats version when loaded, least recently searched first
+        self._versions = OrderedDict()
+
+    def reset(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._versions.clear()
+
+    def add_document(self, user_id, task_id, fields):
+        """
+        Index one task. `fields` maps field names in FIELD_WEIGHTS to text.
+        """
+        weights = defaultdict(int)
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field, 1)
+            for token in tokenize(text):
+                weights[token] += weight
+
+        with self._lock:
+            postings = self._postings.setdefault(user_id, defaultdict(dict))
+            documents = self._documents.setdefault(user_id, {})
+            self._unindex(postings, documents, task_id)
+            for token, weight in weights.items():
+                postings[token][task_id] = weight
+            documents[task_id] = tuple(weights)
+
+    def _unindex(self, postings, documents, task_id):
+        for token in documents.pop(task_id, ()):
+            bucket = postings.get(token)
+            if bucket is not None:
+                bucket.pop(task_id, None)
+                if not bucket:
+                    del postings[token]
+
+    def _load_tasks(self, tasks):
+        for task in tasks:
+            self.add_document(task.user_id, task.id, {
+                'task_title': task.task_title,
+                'task_description': task.task_description,
+                'task_tags': ' '.join(tag.name for tag in task.task_tags.all()),
+            })
+
+    def _live_tasks(self):
+        return (
+            TasksDetail.objects
+            .only('id', 'user_id', 'task_title', 'task_description')
+            .prefetch_related('task_tags')
+        )
+
+    def _stored_version(self, user_id):
+        if not self.versioned:
+            return None
+        return UserTaskStats.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+
+    def _ensure_loaded(self, user_id):
+        version = self._stored_version(user_id)
+        with self._load_lock:
+            with self._lock:
+                if user_id in self._documents and self._versions.get(user_id) == version:
+                    if user_id in self._versions:
+                        self._versions.move_to_end(user_id)
+                    return
+                self._postings[user_id] = defaultdict(dict)
+                self._documents[user_id] = {}
+                self._versions[user_id] = version
+                self._versions.move_to_end(user_id)
+                while len(self._versions) > self.max_users:
+                    evicted, _ = self._versions.popitem(last=False)
+                    self._postings.pop(evicted, None)
+                    self._documents.pop(evicted, None)
+            tasks = self._live_tasks().filter(user_id=user_id)
+            self._load_tasks(tasks.iterator(chunk_size=2000))
+
+    def _advance_versions(self, user_ids):
+        """
+        Called once a write's changes are applied here. A write transaction
+        bumps the stored version once, so a user whose stored version is
+        exactly one past the loaded one has had no other write since loading,
+        and stays loaded. Anything else is reloaded by the next search.
+        """
+        if not self.versioned or not user_ids:
+            return
+        stored = dict(UserTaskStats.objects.filter(user_id__in=user_ids).values_list('user_id', 'version'))
+        with self._lock:
+            for user_id in user_ids:
+                loaded = self._versions.get(user_id)
+                if loaded is not None and stored.get(user_id) == loaded + 1:
+                    self._versions[user_id] = loaded + 1
+
+    def index_tasks(self, task_ids):
+        task_ids = list(task_ids)
+
+        def refresh():
+            with self._lock:
+                loaded_users = set(self._documents)
+            if not loaded_users:
+                return
+            tasks = list(self._live_tasks().filter(id__in=task_ids, user_id__in=loaded_users))
+            self._load_tasks(tasks)
+            self._advance_versions({task.user_id for task in tasks})
+
+        if task_ids:
+            transaction.on_commit(refresh)
+
+    def remove_tasks(self, user_id, task_ids):
+        task_ids = list(task_ids)
+
+        def remove():
+            with self._lock:
+                postings = self._postings.get(user_id)
+                documents = self._documents.get(user_id)
+                if postings is None:
+                    return
+                for task_id in task_ids:
+                    self._unindex(postings, documents, task_id)
+            self._advance_versions({user_id})
+
+        transaction.on_commit(remove)
+
+    def remove_users(self, user_ids):
+        user_ids = list(user_ids)
+
+        def remove():
+            with self._lock:
+                for user_id in user_ids:
+                    self._postings.pop(user_id, None)
+                    self._documents.pop(user_id, None)
+                    self._versions.pop(user_id, None)
+
+        transaction.on_commit(remove)
+
+    def search(self, user_id, query, limit, offset=0):
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        self._ensure_loaded(user_id)
+
+        with self._lock:
+            postings = self._postings.get(user_id, {})
+            total = len(self._documents.get(user_id, ()))
+            buckets = [postings.get(token) for token in tokens]
+            if not all(buckets):
+                return []
+            buckets.sort(key=len)
+            candidates = set(buckets[0]).intersection(*buckets[1:])
+            scored = [
+                (sum(bucket[task_id] * math.log(1 + total / len(bucket)) for bucket in buckets), task_id)
+                for task_id in candidates
+            ]
+
+        scored.sort(reverse=True)
+        return [task_id for _, task_id in scored[offset:offset + limit]]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """
+    Return the process-wide search backend.
+
+    settings.TASK_SEARCH_BACKEND may name a backend class by dotted path;
+    otherwise Postgres uses PostgresSearchBackend and anything else the
+    in-memory index.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = getattr(settings, 'TASK_SEARCH_BACKEND', None)
+                if backend_path:
+                    backend_class = import_string(backend_path)
+                elif connection.vendor == 'postgresql':
+                    backend_class = PostgresSearchBackend
+                else:
+                    backend_class = InMemorySearchBackend
+                _backend = backend_class()
+    return _backend
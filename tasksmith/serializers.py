@@ -1,17 +1,24 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from .models import TasksDetail, Requirements, Tags
 from authentication.models import User
+from .helpers import apply_task_stats_delta, resolve_names, invalidate_marketplace
+from .search import get_search_backend
 
 class RequirementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Requirements
         fields = ['name']
+        # Names are resolved to existing rows on save, so don't reject them as duplicates.
+        extra_kwargs = {'name': {'validators': []}}
 
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tags
         fields = ['name']
+        extra_kwargs = {'name': {'validators': []}}
 
 
 class TaskUploadSerializer(serializers.ModelSerializer):
@@ -45,16 +52,38 @@ class TaskUploadSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         req_data = validated_data.pop('task_requirements', [])
         tag_data = validated_data.pop('task_tags', [])
-        task = TasksDetail.objects.create(**validated_data)
 
-        for req in req_data:
-            obj, _ = Requirements.objects.get_or_create(name=req['name'])
-            task.task_requirements.add(obj)
+        with transaction.atomic():
+            task = TasksDetail.objects.create(**validated_data)
 
-        for tag in tag_data:
-            obj, _ = Tags.objects.get_or_create(name=tag['name'])
-            task.task_tags.add(obj)
+            requirement_ids = resolve_names(Requirements, [req['name'] for req in req_data])
+            if requirement_ids:
+                task.task_requirements.add(*requirement_ids.values())
 
+            tag_ids = resolve_names(Tags, [tag['name'] for tag in tag_data])
+            if tag_ids:
+                task.task_tags.add(*tag_ids.values())
+
+            apply_task_stats_delta(task.user_id, added=[task.task_status])
+            get_search_backend().index_tasks([task.id])
+            invalidate_marketplace(task.task_status)
+
+        return task
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            # Read under a row lock: `instance` may predate a concurrent edit,
+            # and both edits would then remove the same old status from the
+            # counters. The save below also writes the status back. A task
+            # deleted in the meantime is gone rather than saved back to life.
+            old_status = instance.task_status = get_object_or_404(
+                TasksDetail.objects.select_for_update().values_list('task_status', flat=True),
+                pk=instance.pk,
+            )
+            task = super().update(instance, validated_data)
+            apply_task_stats_delta(task.user_id, added=[task.task_status], removed=[old_status])
+            get_search_backend().index_tasks([task.id])
+            invalidate_marketplace(old_status, task.task_status)
         return task
 
 
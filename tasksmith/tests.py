@@ -1,3 +1,955 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import statistics
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.helpers import set_user_specialties
+from authentication.models import User
+from authentication.user_cache import auth_user_cache
+from backend import slow_queries
+from backend.metrics import Registry, registry, render
+from .models import TasksDetail, Tags, Requirements, UserTaskStats
+from .bulk_upload import iter_csv_rows
+from .fast_serializers import compile_serializer
+from .helpers import (
+    NameIdCache, name_id_cache, resolve_names, rebuild_task_stats, compute_task_stats, get_task_read_queryset,
+    apply_task_stats_delta,
+)
+from .pagination import TaskCursorPaginator
+from .serializers import GetTasksSerializer, TaskUploadSerializer, UserProfileSerializer
+from .search import InMemorySearchBackend, get_search_backend
 
 # Create your tests here.
+
+
+def create_tasksmith(email='smith@example.com', **extra_fields):
+    extra_fields.setdefault('account_type', 'tasksmith')
+    extra_fields.setdefault('is_verified', True)
+    user = User(email=email, username=email.split('@')[0], **extra_fields)
+    user.set_password('pass12345')
+    user.save()
+    return user
+
+
+def create_tasks(user, count, **extra_fields):
+    return [
+        TasksDetail.objects.create(
+            user=user,
+            task_assignment_type='single',
+            task_title=f'Task {i}',
+            task_reward_per_completion=10,
+            **extra_fields
+        )
+        for i in range(count)
+    ]
+
+
+class GetTaskPaginationTests(TestCase):
+    def setUp(self):
+        self.user = create_tasksmith()
+        self.tasks = create_tasks(self.user, 5)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('get_user_tasks')
+
+    def test_pages_cover_all_tasks_newest_first(self):
+        seen = []
+        response = self.client.get(self.url, {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(task['id'] for task in response.data['data'])
+            cursor = response.data['pagination']['next_cursor']
+            if not cursor:
+                break
+            response = self.client.get(self.url, {'page_size': 2, 'cursor': cursor})
+
+        self.assertEqual(seen, [task.id for task in reversed(self.tasks)])
+
+    def test_previous_cursor_returns_prior_page(self):
+        first = self.client.get(self.url, {'page_size': 2})
+        second = self.client.get(self.url, {'page_size': 2, 'cursor': first.data['pagination']['next_cursor']})
+        back = self.client.get(self.url, {'page_size': 2, 'cursor': second.data['pagination']['previous_cursor']})
+
+        self.assertEqual(back.data['data'], first.data['data'])
+        self.assertIsNone(first.data['pagination']['previous_cursor'])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(TaskCursorPaginator, 'max_page_size', 3):
+            response = self.client.get(self.url, {'page_size': 10_000})
+        self.assertEqual(len(response.data['data']), 3)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class GetTaskQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = create_tasksmith()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('get_user_tasks')
+
+    def add_tasks_with_relations(self, count):
+        tags = [Tags.objects.get_or_create(name=f'tag-{i}')[0] for i in range(3)]
+        requirements = [Requirements.objects.get_or_create(name=f'req-{i}')[0] for i in range(2)]
+        for task in create_tasks(self.user, count):
+            task.task_tags.set(tags)
+            task.task_requirements.set(requirements)
+
+    def test_query_count_is_constant_in_number_of_tasks(self):
+        # Stats row for the ETag, the page, and one per prefetched relation.
+        for count in (1, 10, 30):
+            TasksDetail.objects.all().delete()
+            self.add_tasks_with_relations(count)
+            rebuild_task_stats(self.user.id)
+            with self.assertNumQueries(4):
+                response = self.client.get(self.url, {'page_size': 50})
+            self.assertEqual(len(response.data['data']), count)
+            self.assertEqual(len(response.data['data'][0]['task_tags']), 3)
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.user = create_tasksmith(phone_number='03001234567')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload_task(self, **data):
+        payload = {
+            'task_assignment_type': 'single',
+            'task_title': 'Logo',
+            'task_reward_per_completion': 5,
+            **data,
+        }
+        response = self.client.post(reverse('task_upload'), payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        return TasksDetail.objects.latest('id')
+
+    def get_dashboard(self):
+        return self.client.get(reverse('dashboard')).data['data']
+
+    def test_counters_follow_task_writes(self):
+        first = self.upload_task()
+        second = self.upload_task(task_status='review')
+        self.client.patch(reverse('edit_task', args=[first.id]), {'task_status': 'completed'}, format='json')
+        self.client.delete(reverse('delete_task', args=[second.id]))
+
+        self.assertEqual(self.get_dashboard(), {
+            'total_tasks': 1,
+            'pending_tasks': 0,
+            'review_tasks': 0,
+            'completed_tasks': 1,
+        })
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.total_tasks, self.user.tasks_completed), (1, 1))
+
+    def test_edit_from_stale_instance_counts_current_status(self):
+        task = self.upload_task()
+        stale = TasksDetail.objects.get(pk=task.pk)
+        # A concurrent edit commits first.
+        self.client.patch(reverse('edit_task', args=[task.id]), {'task_status': 'review'}, format='json')
+
+        serializer = TaskUploadSerializer(stale, data={'task_title': 'Renamed'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        self.assertEqual(TasksDetail.objects.get(pk=task.pk).task_status, 'review')
+        self.assertEqual(self.get_dashboard(), {
+            'total_tasks': 1,
+            'pending_tasks': 0,
+            'review_tasks': 1,
+            'completed_tasks': 0,
+        })
+
+    def test_edit_from_stale_instance_of_deleted_task_is_rejected(self):
+        task = self.upload_task()
+        stale = TasksDetail.objects.get(pk=task.pk)
+        # A concurrent delete commits first.
+        self.client.delete(reverse('delete_task', args=[task.id]))
+
+        serializer = TaskUploadSerializer(stale, data={'task_status': 'review'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(Http404):
+            serializer.save()
+
+        self.assertIsNotNone(TasksDetail.all_objects.get(pk=task.pk).deleted_at)
+        self.assertEqual(self.get_dashboard(), {
+            'total_tasks': 0,
+            'pending_tasks': 0,
+            'review_tasks': 0,
+            'completed_tasks': 0,
+        })
+
+    def test_dashboard_is_a_single_row_read(self):
+        self.upload_task()
+        with self.assertNumQueries(1):
+            self.get_dashboard()
+
+    def test_rebuild_command_repairs_drift(self):
+        self.upload_task()
+        UserTaskStats.objects.filter(user=self.user).update(total_tasks=42, pending_tasks=0)
+
+        call_command('rebuild_task_stats', stdout=StringIO())
+
+        stats = UserTaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.total_tasks, stats.pending_tasks), (1, 1))
+
+    def test_rebuild_command_invalidates_dashboard_etag(self):
+        self.upload_task()
+        UserTaskStats.objects.filter(user=self.user).update(total_tasks=42)
+        etag = self.client.get(reverse('dashboard'))['ETag']
+
+        call_command('rebuild_task_stats', stdout=StringIO())
+
+        response = self.client.get(reverse('dashboard'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['total_tasks'], 1)
+
+
+class TaskBulkUploadTests(TestCase):
+    def setUp(self):
+        self.user = create_tasksmith(phone_number='03001234567')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('task_bulk_upload')
+
+    def test_ndjson_upload_reports_row_errors(self):
+        body = '\n'.join([
+            json.dumps({'task_assignment_type': 'single', 'task_title': 'A', 'task_reward_per_completion': 1,
+                        'task_tags': [{'name': 'design'}, {'name': 'logo'}]}),
+            '{not json',
+            json.dumps({'task_assignment_type': 'single', 'task_title': 'B'}),
+            '',
+            json.dumps({'task_assignment_type': 'single', 'task_title': 'C', 'task_reward_per_completion': 2,
+                        'task_tags': [{'name': 'design'}], 'task_status': 'review'}),
+        ])
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data'], {'created': 2, 'failed': 2})
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        self.assertEqual(Tags.objects.filter(name='design').count(), 1)
+        task = TasksDetail.objects.get(task_title='A')
+        self.assertEqual(sorted(task.task_tags.values_list('name', flat=True)), ['design', 'logo'])
+        self.assertEqual(UserTaskStats.objects.get(user=self.user).review_tasks, 1)
+
+    def test_csv_upload_splits_list_columns(self):
+        body = (
+            'task_assignment_type,task_title,task_reward_per_completion,task_tags,task_requirements\n'
+            'single,Banner,3,design|print,Figma\n'
+            'single,Poster,4,,\n'
+        )
+        response = self.client.post(self.url, body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data'], {'created': 2, 'failed': 0})
+        banner = TasksDetail.objects.get(task_title='Banner')
+        self.assertEqual(list(banner.task_requirements.values_list('name', flat=True)), ['Figma'])
+        self.assertEqual(banner.task_tags.count(), 2)
+
+    def test_unsupported_content_type(self):
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, 415)
+
+
+class ResolveNamesTests(TestCase):
+    def setUp(self):
+        name_id_cache.clear()
+        self.addCleanup(name_id_cache.clear)
+
+    def test_creates_missing_and_reuses_existing(self):
+        design = Tags.objects.create(name='design')
+        ids = resolve_names(Tags, ['design', 'logo', 'logo'])
+
+        self.assertEqual(ids['design'], design.id)
+        self.assertEqual(Tags.objects.filter(name='logo').count(), 1)
+        self.assertEqual(resolve_names(Tags, ['logo']), {'logo': ids['logo']})
+
+    def test_committed_names_are_served_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = resolve_names(Tags, ['design'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_names(Tags, ['design']), ids)
+
+    def test_cache_is_bounded(self):
+        cache = NameIdCache(maxsize=2)
+        cache.set_many(Tags, {'a': 1, 'b': 2})
+        cache.get_many(Tags, ['a'])
+        cache.set_many(Tags, {'c': 3})
+
+        self.assertEqual(cache.get_many(Tags, ['a', 'b', 'c']), {'a': 1, 'c': 3})
+
+
+class SearchTaskTests(TestCase):
+    def setUp(self):
+        self.backend = get_search_backend()
+        self.backend.reset()
+        self.addCleanup(self.backend.reset)
+        self.user = create_tasksmith(phone_number='03001234567')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('search_tasks')
+
+    def upload_task(self, title, description, tags=()):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('task_upload'), {
+                'task_assignment_type': 'single',
+                'task_title': title,
+                'task_description': description,
+                'task_reward_per_completion': 5,
+                'task_tags': [{'name': tag} for tag in tags],
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return TasksDetail.objects.latest('id')
+
+    def search(self, query):
+        return [task['task_title'] for task in self.client.get(self.url, {'q': query}).data['data']]
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.upload_task('Write blog post', 'Needs a logo mention')
+        self.upload_task('Logo for bakery', 'Simple and clean')
+        self.upload_task('Translate menu', 'Urdu to English', tags=['translation'])
+
+        self.assertEqual(self.search('logo'), ['Logo for bakery', 'Write blog post'])
+        self.assertEqual(self.search('translation urdu'), ['Translate menu'])
+        self.assertEqual(self.search('podcast'), [])
+
+    def test_index_follows_writes_after_first_search(self):
+        first = self.upload_task('Logo for bakery', 'Simple and clean')
+        self.assertEqual(self.search('logo'), ['Logo for bakery'])
+
+        self.upload_task('Logo refresh', 'Modernize')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('delete_task', args=[first.id]))
+
+        self.assertEqual(self.search('logo'), ['Logo refresh'])
+
+    def test_own_writes_do_not_reload_the_user(self):
+        task = self.upload_task('Logo for bakery', 'Simple and clean')
+        self.upload_task('Translate menu', 'Urdu to English')
+        self.assertEqual(self.search('logo'), ['Logo for bakery'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('edit_task', args=[task.id]), {'task_title': 'Bakery banner'}, format='json')
+
+        # Only the stats version is read; the user's tasks are not reloaded.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.search(self.user.id, 'banner', limit=10), [task.id])
+
+    def test_writes_from_other_processes_are_picked_up(self):
+        self.upload_task('Logo for bakery', 'Simple and clean')
+        self.assertEqual(self.search('logo'), ['Logo for bakery'])
+
+        # As another worker would: no on_commit hook reaches this index.
+        task = create_tasks(self.user, 1)[0]
+        TasksDetail.objects.filter(id=task.id).update(task_title='Logo refresh')
+        apply_task_stats_delta(self.user.id, added=[task.task_status])
+
+        self.assertEqual(sorted(self.search('logo')), ['Logo for bakery', 'Logo refresh'])
+
+    def test_least_recently_searched_users_are_evicted(self):
+        backend = InMemorySearchBackend(max_users=2)
+        users = [self.user] + [create_tasksmith(f'user{i}@example.com') for i in range(2)]
+        for user in users:
+            backend.search(user.id, 'task', limit=10)
+        self.assertEqual(list(backend._versions), [users[1].id, users[2].id])
+        self.assertNotIn(self.user.id, backend._documents)
+
+    def test_other_users_tasks_are_not_searched(self):
+        other = create_tasksmith('other@example.com')
+        create_tasks(other, 1)
+        self.assertEqual(self.search('task'), [])
+
+    def test_query_is_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+
+class MarketplaceFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.smith = create_tasksmith(phone_number='03001234567')
+        self.worker = create_tasksmith('worker@example.com', account_type='user')
+        self.client = APIClient()
+        self.client.force_authenticate(self.worker)
+        self.url = reverse('marketplace_feed')
+
+    def feed(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [task['task_title'] for task in response.data['data']]
+
+    def test_only_approved_live_tasks_are_listed_and_filtered(self):
+        cheap, rich, design = create_tasks(self.smith, 3, task_status='approved')
+        create_tasks(self.smith, 1)
+        TasksDetail.objects.filter(id=rich.id).update(task_reward_per_completion=50, task_category='writing')
+        TasksDetail.objects.filter(id=design.id).update(task_title='Design')
+        design.task_tags.add(Tags.objects.create(name='design'))
+        deleted = create_tasks(self.smith, 1, task_status='approved')[0]
+        TasksDetail.objects.filter(id=deleted.id).update(deleted_at=timezone.now())
+
+        self.assertEqual(self.feed(), ['Design', 'Task 1', 'Task 0'])
+        self.assertEqual(self.feed(category='writing'), ['Task 1'])
+        self.assertEqual(self.feed(tag='design'), ['Design'])
+        self.assertEqual(self.feed(min_reward=20), ['Task 1'])
+        self.assertEqual(self.feed(max_reward=20), ['Design', 'Task 0'])
+
+    def test_pages_are_cached_until_an_approved_task_changes(self):
+        task = create_tasks(self.smith, 1, task_status='approved')[0]
+        self.feed()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.feed(), ['Task 0'])
+
+        self.client.force_authenticate(self.smith)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('edit_task', args=[task.id]), {'task_title': 'Renamed'}, format='json')
+        self.client.force_authenticate(self.worker)
+
+        self.assertEqual(self.feed(), ['Renamed'])
+
+    def test_invalid_reward_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'min_reward': 'lots'}).status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = create_tasksmith(phone_number='03001234567')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload_task(self):
+        self.client.post(reverse('task_upload'), {
+            'task_assignment_type': 'single',
+            'task_reward_per_completion': 5,
+        }, format='json')
+
+    def test_task_list_and_dashboard_revalidate_on_task_writes(self):
+        self.upload_task()
+        for name in ('get_user_tasks', 'dashboard'):
+            url = reverse(name)
+            first = self.client.get(url)
+            self.assertTrue(first.has_header('Last-Modified'))
+
+            with self.assertNumQueries(1):
+                cached = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(cached.status_code, 304)
+
+        etag = self.client.get(reverse('get_user_tasks'))['ETag']
+        self.upload_task()
+        self.assertEqual(self.client.get(reverse('get_user_tasks'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_task_list_etag_varies_with_page(self):
+        self.upload_task()
+        url = reverse('get_user_tasks')
+        self.assertNotEqual(self.client.get(url)['ETag'], self.client.get(url, {'page_size': 1})['ETag'])
+
+    def test_profile_revalidates_without_queries(self):
+        url = reverse('get-profile')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.user.bio = 'Designer'
+        self.user.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_profile_update_changes_specialties_before_the_save(self):
+        seen_at_save = []
+        original_save = User.save
+
+        def save(user, *args, **kwargs):
+            seen_at_save.append(sorted(user.specialties.values_list('name', flat=True)))
+            return original_save(user, *args, **kwargs)
+
+        with mock.patch.object(User, 'save', save):
+            response = self.client.put(
+                reverse('edit-profile', args=[self.user.id]),
+                encode_multipart(BOUNDARY, {'bio': 'Designer', 'specialties': ['Design']}),
+                content_type=MULTIPART_CONTENT,
+            )
+
+        self.assertEqual(response.status_code, 200)
+        # A read invalidated by the save already sees the new specialties.
+        self.assertEqual(seen_at_save, [['Design']])
+
+    def test_updated_at_moves_on_save(self):
+        task = create_tasks(self.user, 1)[0]
+        created = task.updated_at
+        task.task_title = 'Renamed'
+        task.save()
+        self.assertGreater(task.updated_at, created)
+
+
+class AsyncProfileUpdateTests(TestCase):
+    def setUp(self):
+        auth_user_cache.clear()
+        self.addCleanup(auth_user_cache.clear)
+        self.user = create_tasksmith(phone_number='03001234567')
+        self.url = reverse('async-edit-profile', args=[self.user.id])
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    async def test_multipart_update(self):
+        response = await self.async_client.put(
+            self.url,
+            encode_multipart(BOUNDARY, {'bio': 'Designer', 'specialties': ['Design', 'Writing']}),
+            content_type=MULTIPART_CONTENT,
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['user']['bio'], 'Designer')
+        self.assertEqual(sorted(data['user']['specialties']), ['Design', 'Writing'])
+        self.assertFalse(data['image_upload_pending'])
+        self.assertEqual((await User.objects.aget(pk=self.user.pk)).bio, 'Designer')
+
+    async def test_json_update(self):
+        response = await self.async_client.put(
+            self.url, {'company': 'Acme'}, content_type='application/json', headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['user']['company'], 'Acme')
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.put(self.url, {'bio': 'x'}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('detail', response.json())
+
+    async def test_cannot_update_another_profile(self):
+        other = await sync_to_async(create_tasksmith)('other@example.com', phone_number='98765432101')
+        response = await self.async_client.put(
+            reverse('async-edit-profile', args=[other.id]), {'bio': 'x'},
+            content_type='application/json', headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+
+class SoftDeleteManagerTests(TestCase):
+    def test_objects_skips_soft_deleted_tasks(self):
+        user = create_tasksmith()
+        live, deleted = create_tasks(user, 2)
+        deleted.soft_delete('smith')
+
+        self.assertEqual(list(TasksDetail.objects.all()), [live])
+        self.assertEqual(set(TasksDetail.all_objects.all()), {live, deleted})
+        self.assertEqual(list(TasksDetail.all_objects.deleted()), [deleted])
+        self.assertEqual(user.tasksdetail_set.count(), 2)
+
+    def test_users_with_deleted(self):
+        user = create_tasksmith()
+        user.soft_delete('admin@example.com')
+
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertEqual(list(User.all_objects.deleted()), [user])
+
+
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.user = create_tasksmith(phone_number='03001234567')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_records_requests_per_url_name(self):
+        create_tasks(self.user, 2)
+        self.client.get(reverse('get_user_tasks'))
+        self.client.get(reverse('get_user_tasks'))
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('http_requests_total{view="get_user_tasks",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{view="get_user_tasks",method="GET"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="get_user_tasks",method="GET",le="+Inf"} 2', body)
+        self.assertIn('db_queries_per_request_count{view="get_user_tasks"} 2', body)
+        self.assertRegex(body, r'db_queries_total\{view="get_user_tasks"\} [1-9]')
+        self.assertIn('http_response_size_bytes_count{view="get_user_tasks"} 2', body)
+
+    def test_requires_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        with self.settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer None').status_code, 403)
+
+    def test_sums_metrics_from_other_processes(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_DIR=directory):
+            other = Registry()
+            other.shard().inc('http_requests_total', (('view', 'login'), ('method', 'POST'), ('status', '200')), 3)
+            other.flush(directory)
+            registry.shard().inc('http_requests_total', (('view', 'login'), ('method', 'POST'), ('status', '200')), 2)
+
+            body = render(registry.collect())
+
+        self.assertIn('http_requests_total{view="login",method="POST",status="200"} 5', body)
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        slow_queries.reset()
+        self.addCleanup(slow_queries.reset)
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.log_dir.cleanup)
+        self.user = create_tasksmith(phone_number='03001234567')
+        self.admin = create_tasksmith('admin@example.com', account_type='admin', phone_number='03007654321')
+        self.client = APIClient()
+
+    def test_fingerprint_ignores_literals_and_in_list_length(self):
+        self.assertEqual(
+            slow_queries.fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND "name" = \'x\'  LIMIT 21'),
+            slow_queries.fingerprint('SELECT * FROM "t" WHERE "id" IN (%s) AND "name" = \'y\' LIMIT 5'),
+        )
+
+    def test_logs_slow_queries_with_view_and_plan(self):
+        log_file = os.path.join(self.log_dir.name, 'slow-{pid}.log')
+        with self.settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN=True, SLOW_QUERY_LOG_FILE=log_file):
+            self.client.force_authenticate(self.user)
+            self.client.get(reverse('dashboard'))
+
+            self.client.force_authenticate(self.admin)
+            response = self.client.get(reverse('slow-queries'))
+
+        self.assertEqual(response.status_code, 200)
+        recent = [entry for entry in response.json()['data']['recent'] if entry['view'] == 'dashboard']
+        self.assertTrue(recent)
+        self.assertTrue(any(entry['plan'] for entry in recent))
+        with open(log_file.replace('{pid}', str(os.getpid()))) as log:
+            self.assertIn('"view": "dashboard"', log.read())
+
+    def test_endpoint_is_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(reverse('slow-queries')).status_code, 403)
+
+
+class LoadTestCommandTests(TestCase):
+    def test_replays_mix_and_writes_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command(
+                'loadtest', requests=20, concurrency=1, users=2, tasks_per_user=3,
+                mix='login=1,task_upload=1,get_tasks=1,dashboard=1,profile_edit=1',
+                output=output, label='test', stdout=StringIO(),
+            )
+            with open(output) as results_file:
+                results = json.load(results_file)
+
+        self.assertEqual(results['label'], 'test')
+        self.assertEqual(results['overall']['requests'], 20)
+        self.assertEqual(results['overall']['errors'], 0)
+        self.assertTrue({'p50_ms', 'p95_ms', 'p99_ms', 'rps'} <= set(results['overall']))
+        uploads = results['operations'].get('task_upload', {}).get('requests', 0)
+        self.assertEqual(TasksDetail.objects.filter(user__email__startswith='loadtest-').count(), 2 * 3 + uploads)
+
+
+class SeedBenchmarkDataTests(TestCase):
+    def seed(self, users, tasks):
+        call_command('seed_benchmark_data', users=users, tasks=tasks, seed=7, stdout=StringIO())
+
+    def snapshot(self):
+        return (
+            list(User.objects.filter(email__startswith='bench-').order_by('id').values_list('email', 'account_type', 'bio')),
+            list(
+                TasksDetail.all_objects.filter(user__email__startswith='bench-').order_by('id')
+                .values_list('user__email', 'task_title', 'task_status', 'task_reward_per_completion')
+            ),
+            sorted(TasksDetail.task_tags.through.objects.values_list('tasksdetail__task_title', 'tags__name')),
+        )
+
+    def test_top_up_matches_single_run(self):
+        self.seed(users=15, tasks=200)
+        self.seed(users=15, tasks=12_345)
+        topped_up = self.snapshot()
+
+        User.all_objects.filter(email__startswith='bench-').delete()
+        self.seed(users=15, tasks=12_345)
+
+        self.assertEqual(len(topped_up[1]), 12_345)
+        self.assertEqual(self.snapshot(), topped_up)
+
+    def test_task_stats_match_seeded_tasks(self):
+        self.seed(users=10, tasks=300)
+        stats = {row.user_id: row for row in UserTaskStats.objects.filter(user__email__startswith='bench-')}
+        for user_id, counters in compute_task_stats().items():
+            self.assertEqual(stats[user_id].total_tasks, counters['total_tasks'])
+            self.assertEqual(User.objects.get(pk=user_id).tasks_completed, counters['completed_tasks'])
+        # Owners are skewed: the busiest user has far more than an even share.
+        self.assertGreater(max(row.total_tasks for row in stats.values()), 3 * 300 / 10)
+
+    def test_seeded_tasks_are_searchable(self):
+        backend = get_search_backend()
+        with mock.patch.object(backend, 'index_tasks', wraps=backend.index_tasks) as index_tasks:
+            self.seed(users=5, tasks=50)
+        indexed = {task_id for call in index_tasks.call_args_list for task_id in call.args[0]}
+        self.assertEqual(indexed, set(TasksDetail.objects.filter(user__email__startswith='bench-').values_list('id', flat=True)))
+
+        task = TasksDetail.objects.filter(user__email__startswith='bench-').first()
+        word = task.task_title.split()[0].lower()
+        self.assertIn(task.id, backend.search(task.user_id, word, limit=100))
+
+
+PERF_BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'perf_baseline.json')
+PERF_DATASET_SIZES = (1, 50, 500)
+# Maximum queries per request once the auth user cache is warm. They must
+# not grow with the dataset; a rise here is usually an N+1.
+QUERY_BUDGETS = {
+    'get_tasks': 4,
+    'dashboard': 1,
+    'get_profile': 1,
+    'task_upload': 9,
+    'login': 2,
+}
+
+
+@override_settings(
+    # The budgets are for the views; PBKDF2 would make up nearly all of the
+    # login latency and most of this suite's run time.
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    RATE_LIMITS={},
+    # Budgets assume a warm user cache; the test runs in one process.
+    AUTH_USER_CACHE_ALLOW_LOCAL=True,
+    EMAIL_OUTBOX_ENABLED=True,
+)
+class PerformanceRegressionTests(TestCase):
+    """
+    Query budgets and in-process latency baselines per endpoint, at several
+    dataset sizes: `size` tasks (3 tags and 2 requirements each) for the
+    requesting user, and `size` other users with one task each.
+
+    Latency medians are compared with perf_baseline.json and fail past
+    PERF_LATENCY_TOLERANCE (default 1.0, i.e. twice the baseline). After an
+    intended change, or on a new machine, re-record the baseline with
+    PERF_UPDATE_BASELINE=1 and commit it.
+    """
+    repeats = 15
+
+    def setUp(self):
+        auth_user_cache.clear()
+        self.addCleanup(auth_user_cache.clear)
+        self.client = APIClient()
+
+    def build_dataset(self, size):
+        User.all_objects.filter(email__endswith='@perf.example.com').delete()
+        user = create_tasksmith('owner@perf.example.com', phone_number='03000000000', bio='Benchmarks things.')
+        set_user_specialties(user, ['design', 'writing', 'research'])
+
+        password = user.password
+        others = User.objects.bulk_create([
+            User(email=f'other-{i}@perf.example.com', username=f'other-{i}', password=password,
+                 account_type='tasksmith', is_verified=True)
+            for i in range(size)
+        ])
+        tasks = TasksDetail.objects.bulk_create(
+            [TasksDetail(user=user, task_assignment_type='single', task_title=f'Task {i}',
+                         task_reward_per_completion=10) for i in range(size)]
+            + [TasksDetail(user=other, task_assignment_type='single', task_title='Other',
+                           task_reward_per_completion=10) for other in others]
+        )
+        tags = [Tags.objects.get_or_create(name=f'perf-tag-{i}')[0] for i in range(3)]
+        requirements = [Requirements.objects.get_or_create(name=f'perf-req-{i}')[0] for i in range(2)]
+        TagLink, RequirementLink = TasksDetail.task_tags.through, TasksDetail.task_requirements.through
+        TagLink.objects.bulk_create(
+            [TagLink(tasksdetail=task, tags=tag) for task in tasks for tag in tags])
+        RequirementLink.objects.bulk_create(
+            [RequirementLink(tasksdetail=task, requirements=requirement) for task in tasks for requirement in requirements])
+        rebuild_task_stats(user.id)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return user
+
+    def endpoints(self, user):
+        return {
+            'get_tasks': lambda: self.client.get(reverse('get_user_tasks'), {'page_size': 20}),
+            'dashboard': lambda: self.client.get(reverse('dashboard')),
+            'get_profile': lambda: self.client.get(reverse('get-profile')),
+            'task_upload': lambda: self.client.post(reverse('task_upload'), {
+                'task_assignment_type': 'single', 'task_title': 'Logo', 'task_reward_per_completion': 5,
+                'task_tags': [{'name': 'perf-tag-0'}, {'name': 'perf-tag-1'}],
+            }, format='json'),
+            'login': lambda: self.client.post(reverse('login'), {
+                'email': user.email, 'password': 'pass12345',
+            }, format='json'),
+        }
+
+    def measure(self, call):
+        """
+        Warm up, then return (SQL of one request, median latency in ms).
+        """
+        self.assertLess(call().status_code, 300)
+        with CaptureQueriesContext(connection) as captured:
+            response = call()
+        self.assertLess(response.status_code, 300)
+        # Read now: later requests reset the connection's query log.
+        queries = [query['sql'] for query in captured.captured_queries]
+
+        latencies = []
+        for _ in range(self.repeats):
+            started = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        return queries, statistics.median(latencies)
+
+    def test_endpoints_stay_within_query_budgets_and_latency_baseline(self):
+        with open(PERF_BASELINE_FILE) as baseline_file:
+            baseline = json.load(baseline_file)
+        tolerance = float(os.environ.get('PERF_LATENCY_TOLERANCE', 1.0))
+        update = os.environ.get('PERF_UPDATE_BASELINE') == '1'
+
+        measured = {}
+        for size in PERF_DATASET_SIZES:
+            user = self.build_dataset(size)
+            for name, call in self.endpoints(user).items():
+                key = f'{name}:{size}'
+                with self.subTest(endpoint=name, size=size):
+                    queries, latency = self.measure(call)
+                    measured[key] = round(latency, 3)
+                    self.assertLessEqual(
+                        len(queries), QUERY_BUDGETS[name],
+                        f'{key} ran {len(queries)} queries:\n'
+                        + '\n'.join(queries),
+                    )
+                    if update:
+                        continue
+                    self.assertIn(key, baseline, f'No latency baseline for {key}; run with PERF_UPDATE_BASELINE=1.')
+                    # 1ms of slack keeps sub-millisecond endpoints from flapping.
+                    limit = baseline[key] * (1 + tolerance) + 1
+                    self.assertLessEqual(
+                        latency, limit,
+                        f'{key} took {latency:.2f}ms (median), over the {baseline[key]:.2f}ms baseline '
+                        f'by more than the {tolerance:.0%} tolerance.',
+                    )
+
+        if update:
+            with open(PERF_BASELINE_FILE, 'w') as baseline_file:
+                json.dump(dict(sorted(measured.items())), baseline_file, indent=2)
+                baseline_file.write('\n')
+
+
+class CompiledSerializerTests(TestCase):
+    def setUp(self):
+        self.user = create_tasksmith(phone_number='03001234567', bio='Bio', wallet_balance='12.50')
+        set_user_specialties(self.user, ['writing', 'design'])
+        tags = [Tags.objects.get_or_create(name=name)[0] for name in ('zeta', 'alpha', 'ünïcode')]
+        requirements = [Requirements.objects.get_or_create(name=f'req-{i}')[0] for i in range(2)]
+        tasks = create_tasks(self.user, 4, task_maximum_completions=None)
+        tasks[0].task_tags.set(tags)
+        tasks[0].task_requirements.set(requirements)
+        tasks[1].task_tags.set(tags[1:])
+        rebuild_task_stats(self.user.id)
+
+    def assertSameJSON(self, compiled_data, drf_data):
+        self.assertEqual(JSONRenderer().render(compiled_data), JSONRenderer().render(drf_data))
+
+    def test_task_list_matches_model_serializer(self):
+        queryset = get_task_read_queryset(self.user).order_by('-created_at', '-id')
+        compiled = compile_serializer(GetTasksSerializer)
+        self.assertSameJSON(compiled.render(compiled.values(queryset)), GetTasksSerializer(queryset, many=True).data)
+
+    def test_profile_matches_model_serializer(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertSameJSON(
+            compile_serializer(UserProfileSerializer).render_instance(user), UserProfileSerializer(user).data,
+        )
+
+    def test_list_view_renders_one_query_per_relation(self):
+        # Stats row for the ETag, the page, then requirements and tags.
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertNumQueries(4):
+            response = client.get(reverse('get_user_tasks'))
+        data = response.json()['data']
+        self.assertEqual([tag['name'] for tag in data[-1]['task_tags']], ['zeta', 'alpha', 'ünïcode'])
+        self.assertEqual(data[0]['task_tags'], [])
+
+    def test_unsupported_fields_are_rejected_at_compile_time(self):
+        class MethodSerializer(serializers.ModelSerializer):
+            title = serializers.SerializerMethodField()
+
+            class Meta:
+                model = TasksDetail
+                fields = ['id', 'title']
+
+        with self.assertRaises(ImproperlyConfigured):
+            compile_serializer(MethodSerializer)
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        self.user = create_tasksmith()
+        self.tasks = create_tasks(self.user, 5)
+        tags = [Tags.objects.get_or_create(name=name)[0] for name in ('logo', 'urdu')]
+        self.tasks[0].task_tags.set(tags)
+        self.tasks[0].task_requirements.add(Requirements.objects.get_or_create(name='figma')[0])
+        self.tasks[4].soft_delete('smith@example.com')
+        create_tasks(create_tasksmith('other@example.com'), 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_tasks'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_streams_live_tasks_oldest_first(self):
+        response, body = self.export()
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([row['id'] for row in rows], [task.id for task in self.tasks[:4]])
+        self.assertEqual([tag['name'] for tag in rows[0]['task_tags']], ['logo', 'urdu'])
+        self.assertEqual(rows[0]['task_requirements'], [{'name': 'figma'}])
+
+    def test_csv_round_trips_through_bulk_upload_parser(self):
+        _, body = self.export(output='csv')
+        rows = [data for _, data, _ in iter_csv_rows(body.decode().splitlines(keepends=True))]
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['task_tags'], [{'name': 'logo'}, {'name': 'urdu'}])
+        self.assertEqual(rows[0]['task_title'], 'Task 0')
+
+    def test_gzip(self):
+        response, body = self.export(gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.ndjson.gz', response['Content-Disposition'])
+        self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 4)
+
+    def test_relations_are_fetched_per_chunk(self):
+        with self.settings(TASK_EXPORT_CHUNK_SIZE=2):
+            response = self.client.get(reverse('export_tasks'))
+            # One streamed task query, then requirements and tags per chunk.
+            with self.assertNumQueries(1 + 2 * 2):
+                b''.join(response.streaming_content)
+
+    def test_empty_csv_has_header(self):
+        TasksDetail.objects.filter(user=self.user).delete()
+        _, body = self.export(output='csv')
+        self.assertTrue(body.decode().startswith('id,task_title,'))
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get(reverse('export_tasks'), {'output': 'xml'}).status_code, 400)
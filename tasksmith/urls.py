@@ -1,13 +1,18 @@
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path('health-check/', views.HealthCheckView.as_view(), name='health_check'),
     path('task-upload/', views.TaskUploadView.as_view(), name='task_upload'),
+    path('task-bulk-upload/', views.TaskBulkUploadView.as_view(), name='task_bulk_upload'),
     path('get-tasks/', views.GetTaskView.as_view(), name='get_user_tasks'),
+    path('export-tasks/', views.TaskExportView.as_view(), name='export_tasks'),
+    path('marketplace/', views.MarketplaceFeedView.as_view(), name='marketplace_feed'),
+    path('search-tasks/', views.SearchTaskView.as_view(), name='search_tasks'),
     path('edit-task/<int:task_id>/', views.EditTaskView.as_view(), name='edit_task'),
     path('delete-task/<int:task_id>/', views.TaskDeleteView.as_view(), name='delete_task'),
     path('edit-profile/<int:pk>/', views.ProfileUpdateView.as_view(), name='edit-profile'),
     path('get-profile/', views.GetProfileView.as_view(), name='get-profile'),
     path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('async/edit-profile/<int:pk>/', async_views.AsyncProfileUpdateView.as_view(), name='async-edit-profile'),
 ]
\ No newline at end of file
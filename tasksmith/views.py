@@ -6,11 +6,24 @@ from rest_framework.response import Response
 from .serializers import TaskUploadSerializer, GetTasksSerializer, UserProfileSerializer
 from authentication.permissions import IsTasksmith, IsAdminOrOwner
 from .models import TasksDetail
-from authentication.models import User, Specialty
+from authentication.models import User
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from authentication.helpers import upload_to_imagekit
-from django.db import models
+from authentication.helpers import upload_to_imagekit, set_user_specialties
+from authentication.imagekit import upload_user_image_deferred
+from .pagination import TaskCursorPaginator, InvalidCursor
+from .fast_serializers import compile_serializer
+from .helpers import (
+    get_task_read_queryset, get_task_stats, apply_task_stats_delta,
+    get_marketplace_queryset, get_marketplace_version, marketplace_cache_key, invalidate_marketplace,
+    make_etag, get_not_modified_response, set_validators,
+)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from .search import get_search_backend
+from .bulk_upload import get_upload_format, iter_csv_rows, iter_ndjson_rows, ingest_tasks, UnsupportedFormat
+from .export import EXPORT_FORMATS, export_tasks
 
 # Create your views here.
 
@@ -59,16 +72,221 @@ class TaskUploadView(APIView):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
 
+class TaskBulkUploadView(APIView):
+    """
+    Create many tasks from an NDJSON or CSV request body.
+
+    The body is read line by line and validated in chunks, so uploads of any
+    size are handled in bounded memory. Invalid rows are reported back by row
+    number; valid rows are still created.
+    """
+    permission_classes = [IsAuthenticated, IsTasksmith]
+
+    def post(self, request):
+        user = request.user
+        if not user.phone_number:
+            return Response({
+                'status_code': 400,
+                'message': 'Phone number is required to upload a task.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not user.is_verified:
+            return Response({
+                'status_code': 403,
+                'message': 'Your account must be verified to upload tasks.'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            upload_format = get_upload_format(request.content_type)
+        except UnsupportedFormat as error:
+            return Response({
+                'status_code': 415,
+                'message': str(error)
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        # Read the raw body stream; touching request.data would buffer it all.
+        stream = request.stream
+        if stream is None:
+            return Response({
+                'status_code': 400,
+                'message': 'Request body is empty.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = iter_ndjson_rows(stream) if upload_format == 'ndjson' else iter_csv_rows(stream)
+        created, failed, errors = ingest_tasks(user, rows)
+
+        if not created:
+            return Response({
+                'status_code': 400,
+                'message': 'Bulk upload failed. No tasks were created.',
+                'data': {'created': created, 'failed': failed},
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status_code': 201,
+            'message': f'{created} tasks uploaded successfully.',
+            'data': {'created': created, 'failed': failed},
+            'errors': errors
+        }, status=status.HTTP_201_CREATED)
+
 class GetTaskView(APIView):
     permission_classes = [IsAuthenticated, IsTasksmith]
 
     def get(self, request):
-        tasks = TasksDetail.objects.filter(user=request.user, deleted_at__isnull=True)
-        serializer = GetTasksSerializer(tasks, many=True)
+        # The stats row versions every write to the user's tasks, so polls
+        # that have seen this version are answered without listing anything.
+        stats = get_task_stats(request.user.id)
+        etag = make_etag('tasks', request.user.id, stats.version, stats.tasks_updated_at, request.GET.urlencode())
+        not_modified = get_not_modified_response(request, etag, stats.tasks_updated_at)
+        if not_modified is not None:
+            return not_modified
+
+        # Read-only list: rendered from values() rows by the compiled serializer.
+        tasks = compile_serializer(GetTasksSerializer)
+        paginator = TaskCursorPaginator(request)
+        try:
+            page = paginator.paginate_queryset(tasks.values(get_task_read_queryset(request.user)))
+        except InvalidCursor as error:
+            return Response({
+                'status_code': 400,
+                'message': str(error)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response({
+            'status_code': 200,
+            'message': 'Tasks fetched successfully.',
+            'data': tasks.render(page),
+            'pagination': paginator.get_pagination_data()
+        }, status=status.HTTP_200_OK)
+        return set_validators(response, etag, stats.tasks_updated_at)
+
+class TaskExportView(APIView):
+    """
+    Stream all of the user's live tasks, oldest first, as NDJSON (default)
+    or CSV (`output=csv`), gzipped with `gzip=1`. Tasks are read and
+    written in chunks of TASK_EXPORT_CHUNK_SIZE, so memory does not grow
+    with the number of tasks.
+    """
+    permission_classes = [IsAuthenticated, IsTasksmith]
+
+    def get(self, request):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'status_code': 400,
+                'message': f'output must be one of: {", ".join(EXPORT_FORMATS)}.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        compress = request.query_params.get('gzip') in ('1', 'true')
+        content_type, extension = EXPORT_FORMATS[export_format]
+        filename = f'tasks-{request.user.id}.{extension}'
+        if compress:
+            content_type, filename = 'application/gzip', filename + '.gz'
+
+        response = StreamingHttpResponse(
+            export_tasks(request.user, export_format, settings.TASK_EXPORT_CHUNK_SIZE, compress),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class MarketplaceFeedView(APIView):
+    """
+    Approved tasks from all tasksmiths, newest first, filterable by
+    `category`, `tag`, `min_reward` and `max_reward`. Pages are cached for
+    MARKETPLACE_CACHE_TIMEOUT seconds and dropped whenever an approved task
+    is written.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            min_reward = int(params['min_reward']) if params.get('min_reward') else None
+            max_reward = int(params['max_reward']) if params.get('max_reward') else None
+        except ValueError:
+            return Response({
+                'status_code': 400,
+                'message': 'min_reward and max_reward must be integers.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = TaskCursorPaginator(request)
+        filters = {
+            'category': params.get('category') or None,
+            'tag': params.get('tag') or None,
+            'min_reward': min_reward,
+            'max_reward': max_reward,
+        }
+        cache_key = marketplace_cache_key(get_marketplace_version(), {
+            **filters,
+            'cursor': params.get(paginator.cursor_query_param),
+            'page_size': paginator.get_page_size(),
+        })
+
+        payload = cache.get(cache_key)
+        if payload is None:
+            tasks = compile_serializer(GetTasksSerializer)
+            try:
+                page = paginator.paginate_queryset(tasks.values(get_marketplace_queryset(**filters)))
+            except InvalidCursor as error:
+                return Response({
+                    'status_code': 400,
+                    'message': str(error)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            payload = {
+                'data': tasks.render(page),
+                'pagination': paginator.get_pagination_data(),
+            }
+            cache.set(cache_key, payload, settings.MARKETPLACE_CACHE_TIMEOUT)
+
         return Response({
             'status_code': 200,
             'message': 'Tasks fetched successfully.',
-            'data': serializer.data
+            **payload
+        }, status=status.HTTP_200_OK)
+
+class SearchTaskView(APIView):
+    """
+    Full-text search over the user's tasks (title, tags and description),
+    best matches first. Pages with `offset` and a capped `page_size`.
+    """
+    permission_classes = [IsAuthenticated, IsTasksmith]
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                'status_code': 400,
+                'message': 'A search query (q) is required.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page_size = min(max(int(request.query_params.get('page_size', self.page_size)), 1), self.max_page_size)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({
+                'status_code': 400,
+                'message': 'page_size and offset must be integers.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        task_ids = get_search_backend().search(request.user.id, query, limit=page_size + 1, offset=offset)
+        has_next = len(task_ids) > page_size
+        task_ids = task_ids[:page_size]
+
+        compiled = compile_serializer(GetTasksSerializer)
+        rows = {row['id']: row for row in compiled.values(get_task_read_queryset(request.user).filter(id__in=task_ids))}
+        return Response({
+            'status_code': 200,
+            'message': 'Tasks fetched successfully.',
+            'data': compiled.render([rows[task_id] for task_id in task_ids if task_id in rows]),
+            'pagination': {
+                'offset': offset,
+                'next_offset': offset + page_size if has_next else None,
+            }
         }, status=status.HTTP_200_OK)
 
 class EditTaskView(APIView):
@@ -76,7 +294,7 @@ class EditTaskView(APIView):
 
     def patch(self, request, task_id):
         user = request.user
-        task = get_object_or_404(TasksDetail, id=task_id, user=user, deleted_at__isnull=True)
+        task = get_object_or_404(TasksDetail.objects, id=task_id, user=user)
 
         serializer = TaskUploadSerializer(task, data=request.data, partial=True, context={'request': request})
         if serializer.is_valid():
@@ -97,17 +315,20 @@ class TaskDeleteView(APIView):
     permission_classes = [IsAuthenticated, IsAdminOrOwner]
 
     def delete(self, request, task_id):
-        try:
-            task = TasksDetail.objects.get(id=task_id, user=request.user, deleted_at__isnull=True)
-        except TasksDetail.DoesNotExist:
-            return Response({
-                'status_code': 404,
-                'message': 'Task not found.'
-            }, status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            # Locked so a concurrent edit or delete cannot change the status
+            # removed from the counters below.
+            task = TasksDetail.objects.select_for_update().filter(id=task_id, user=request.user).first()
+            if task is None:
+                return Response({
+                    'status_code': 404,
+                    'message': 'Task not found.'
+                }, status=status.HTTP_404_NOT_FOUND)
 
-        task.deleted_at = timezone.now()
-        task.deleted_by = request.user.username
-        task.save()
+            task.soft_delete(request.user.username)
+            apply_task_stats_delta(task.user_id, removed=[task.task_status])
+            get_search_backend().remove_tasks(task.user_id, [task.id])
+            invalidate_marketplace(task.task_status)
 
         return Response({
             'status_code': 200,
@@ -197,9 +418,10 @@ class ProfileUpdateView(APIView):
             company = request.data.get('company', user.company)
             specialties_data = request.data.getlist('specialties', [])  # Expecting a list
             image_file = request.FILES.get('image', None)
+            defer_image = bool(image_file) and settings.IMAGEKIT_UPLOAD_MODE == 'deferred'
 
             # Handle image upload
-            if image_file:
+            if image_file and not defer_image:
                 user.image = upload_to_imagekit(image_file)
             elif request.data.get('image') == '':
                 user.image = None
@@ -212,22 +434,20 @@ class ProfileUpdateView(APIView):
             user.website = website
             user.company = company
 
-            user.save()
-
-            if isinstance(specialties_data, list):
-                new_specialties = []
-                for specialty_name in specialties_data:
-                    specialty_name = specialty_name.strip()
-                    if specialty_name:
-                        specialty_obj, _ = Specialty.objects.get_or_create(name=specialty_name)
-                        new_specialties.append(specialty_obj)
-
-                # Replace old with new
-                user.specialties.set(new_specialties)
-
-                # Delete specialties no longer used by any user
-                Specialty.objects.annotate(user_count=models.Count('user')).filter(user_count=0).delete()
-
+            # Specialties first, in the same transaction: the save moves
+            # updated_at and invalidates the cached user, so a profile read
+            # in between would otherwise serve the old specialties under the
+            # new ETag.
+            with transaction.atomic():
+                if isinstance(specialties_data, list):
+                    # Replace old with new. Specialties left unused are removed
+                    # later by `manage.py purge_orphan_specialties`.
+                    set_user_specialties(user, specialties_data)
+                user.save()
+
+            # Started after user.save() so the save cannot overwrite the new URL.
+            if defer_image:
+                upload_user_image_deferred(user.id, image_file)
 
             return Response({
                 'success': True,
@@ -244,7 +464,8 @@ class ProfileUpdateView(APIView):
                         'website': user.website,
                         'image': user.image,
                         'specialties': [s.name for s in user.specialties.all()]
-                    }
+                    },
+                    'image_upload_pending': defer_image,
                 }
             }, status=status.HTTP_200_OK)
 
@@ -255,19 +476,32 @@ class ProfileUpdateView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
+PROFILE_ETAG_FIELDS = [
+    'id', 'updated_at', 'full_name', 'email', 'bio', 'company', 'location',
+    'phone_number', 'website', 'total_tasks', 'tasks_completed', 'wallet_balance',
+]
+
+
 class GetProfileView(APIView):
     permission_classes = [IsAuthenticated, IsTasksmith]
 
     def get(self, request):
         user = request.user
-        serializer = UserProfileSerializer(user)
-        return Response({
+        # request.user is already loaded, so the validators cost no query.
+        # updated_at moves on every save, including specialty edits.
+        etag = make_etag('profile', *(getattr(user, field) for field in PROFILE_ETAG_FIELDS))
+        not_modified = get_not_modified_response(request, etag, user.updated_at)
+        if not_modified is not None:
+            return not_modified
+
+        response = Response({
             'status_code': 200,
             'message': 'Profile retrieved successfully.',
             'data': {
-                'user': serializer.data
+                'user': compile_serializer(UserProfileSerializer).render_instance(user)
             }
         }, status=status.HTTP_200_OK)
+        return set_validators(response, etag, user.updated_at)
 
 
 class ChangePasswordView(APIView):
@@ -324,21 +558,22 @@ class DashboardView(APIView):
 
     def get(self, request):
         user = request.user
-        user_tasks = TasksDetail.objects.filter(user=user, deleted_at__isnull=True)
 
-        # Task counts by status
-        total_tasks = user_tasks.count()
-        pending_tasks = user_tasks.filter(task_status='pending').count()
-        review_tasks = user_tasks.filter(task_status='review').count()
-        completed_tasks = user_tasks.filter(task_status='completed').count()
+        # Task counts by status, maintained incrementally on task writes
+        stats = get_task_stats(user.id)
+        etag = make_etag('dashboard', user.id, stats.version, stats.tasks_updated_at)
+        not_modified = get_not_modified_response(request, etag, stats.tasks_updated_at)
+        if not_modified is not None:
+            return not_modified
 
-        return Response({
+        response = Response({
             'success': True,
             'message': 'Dashboard stats fetched successfully.',
             'data': {
-                'total_tasks': total_tasks,
-                'pending_tasks': pending_tasks,
-                'review_tasks': review_tasks,
-                'completed_tasks': completed_tasks
+                'total_tasks': stats.total_tasks,
+                'pending_tasks': stats.pending_tasks,
+                'review_tasks': stats.review_tasks,
+                'completed_tasks': stats.completed_tasks
             }
         }, status=status.HTTP_200_OK)
+        return set_validators(response, etag, stats.tasks_updated_at)